@@ -29,12 +29,14 @@ class CustomConv1D(tf.keras.layers.Layer):
         return self.activation(conv)
 
 class CustomMaxPooling1D(tf.keras.layers.Layer):
-    def __init__(self, pool_size, **kwargs):
+    def __init__(self, pool_size, strides=1, **kwargs):
         super(CustomMaxPooling1D, self).__init__(**kwargs)
         self.pool_size = pool_size
+        self.strides = strides
 
     def call(self, inputs):
-        return tf.nn.pool(inputs, window_shape=[self.pool_size], pooling_type='MAX', padding='SAME')
+        return tf.nn.pool(inputs, window_shape=[self.pool_size], pooling_type='MAX', padding='SAME',
+                          strides=[self.strides])
 
 class CustomDense(tf.keras.layers.Layer):
     def __init__(self, units, activation, **kwargs):
@@ -116,3 +118,49 @@ class NSLPredictionModel(tf.keras.Model):
     @classmethod
     def from_config(cls, config):
         return cls()
+
+
+@tf.keras.utils.register_keras_serializable()
+class NSLStudentModel(tf.keras.Model):
+    """Compact NSLPredictionModel variant trained by distillation (see distill.py)"""
+    def __init__(self, conv1_filters=16, conv2_filters=32, dense_units=64, **kwargs):
+        super(NSLStudentModel, self).__init__(**kwargs)
+        self.conv1_filters = conv1_filters
+        self.conv2_filters = conv2_filters
+        self.dense_units = dense_units
+        self.conv1 = CustomConv1D(conv1_filters, kernel_size=3, activation=custom_relu)
+        self.pool1 = CustomMaxPooling1D(pool_size=2, strides=2)
+        self.conv2 = CustomConv1D(conv2_filters, kernel_size=3, activation=custom_relu)
+        self.pool2 = CustomMaxPooling1D(pool_size=2, strides=2)
+        self.flatten = tf.keras.layers.Flatten()
+        self.dense1 = CustomDense(dense_units, activation=custom_relu)
+        self.dense2 = CustomDense(len(alphabets), activation=custom_softmax)
+
+    def call(self, inputs):
+        x = self.conv1(inputs)
+        x = self.pool1(x)
+        x = self.conv2(x)
+        x = self.pool2(x)
+        x = self.flatten(x)
+        x = self.dense1(x)
+        return self.dense2(x)
+
+    def compute_output_shape(self, input_shape):
+        return (input_shape[0], len(alphabets))
+
+    def get_config(self):
+        config = super(NSLStudentModel, self).get_config()
+        config.update({
+            "conv1_filters": self.conv1_filters,
+            "conv2_filters": self.conv2_filters,
+            "dense_units": self.dense_units,
+        })
+        return config
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            conv1_filters=config["conv1_filters"],
+            conv2_filters=config["conv2_filters"],
+            dense_units=config["dense_units"],
+        )
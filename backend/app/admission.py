@@ -0,0 +1,158 @@
+# Admission control and load shedding for the prediction endpoint
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from fastapi import Request
+
+from .auth import decode_access_token
+from .config import settings
+from .metrics import PREDICT_SHED_TOTAL, PREDICT_QUEUE_SECONDS, PREDICT_QUEUE_DEPTH
+
+# Weight of the newest observation in the service time average
+SERVICE_TIME_SMOOTHING = 0.2
+
+_queue_timer = PREDICT_QUEUE_SECONDS.labels()
+_queue_depth = PREDICT_QUEUE_DEPTH.labels()
+
+
+class Overloaded(Exception):
+    """Raised when a request is shed instead of queued"""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"Server overloaded ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class AdmissionController:
+    """Bounds concurrent predictions and queues the rest fairly per client.
+
+    Up to max_concurrency requests run at once. Others wait in a per-client queue,
+    and freed slots go to clients in round-robin order, so one chatty client cannot
+    starve the others. A request is shed right away when the queue is full or its
+    estimated wait exceeds the deadline, and later if it is still waiting when the
+    deadline passes. All methods run on the event loop thread.
+    """
+
+    def __init__(self, max_concurrency: int = 64, max_queue_depth: int = 256, deadline_ms: float = 1000.0):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue_depth = max(0, max_queue_depth)
+        self.deadline = max(0.0, deadline_ms) / 1000
+        self.in_flight = 0
+        self.queued = 0
+        self.service_time = 0.0
+        self._queues: "OrderedDict[str, deque]" = OrderedDict()
+
+    @classmethod
+    def from_settings(cls) -> "AdmissionController":
+        return cls(
+            max_concurrency=settings.PREDICT_MAX_CONCURRENCY,
+            max_queue_depth=settings.PREDICT_MAX_QUEUE_DEPTH,
+            deadline_ms=settings.PREDICT_DEADLINE_MS,
+        )
+
+    def estimated_wait(self, key: str) -> float:
+        """Seconds a new request from `key` would wait for a slot.
+
+        Round-robin serves one request per waiting client per turn, so the request
+        is roughly behind (its client's backlog + 1) requests from every client.
+        """
+        own = len(self._queues.get(key, ()))
+        clients = len(self._queues) + (0 if key in self._queues else 1)
+        ahead = min(self.queued, clients * (own + 1))
+        return (ahead + 1) * self.service_time / self.max_concurrency
+
+    def _shed(self, reason: str, retry_after: float):
+        PREDICT_SHED_TOTAL.labels(reason).inc()
+        raise Overloaded(reason, retry_after)
+
+    async def acquire(self, key: str):
+        """Wait for an inference slot or raise Overloaded"""
+        if self.in_flight < self.max_concurrency and not self.queued:
+            self.in_flight += 1
+            return
+
+        if self.queued >= self.max_queue_depth:
+            self._shed("queue_full", self.estimated_wait(key))
+        wait = self.estimated_wait(key)
+        if wait > self.deadline:
+            self._shed("deadline", wait)
+
+        future = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(key, deque()).append(future)
+        self.queued += 1
+        _queue_depth.set(self.queued)
+        try:
+            await asyncio.wait_for(future, self.deadline)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # Granted a slot just as we gave up on it: hand it on
+                self.release()
+            else:
+                self._remove(key, future)
+            if isinstance(e, asyncio.TimeoutError):
+                self._shed("timeout", self.estimated_wait(key))
+            raise
+
+    def _remove(self, key: str, future):
+        waiters = self._queues.get(key)
+        if waiters is None or future not in waiters:
+            return
+        waiters.remove(future)
+        if not waiters:
+            del self._queues[key]
+        self.queued -= 1
+        _queue_depth.set(self.queued)
+
+    def release(self, service_time: Optional[float] = None):
+        """Free a slot and grant it to the next client in round-robin order"""
+        self.in_flight -= 1
+        if service_time is not None:
+            if self.service_time:
+                self.service_time += SERVICE_TIME_SMOOTHING * (service_time - self.service_time)
+            else:
+                self.service_time = service_time
+
+        while self._queues and self.in_flight < self.max_concurrency:
+            key, waiters = next(iter(self._queues.items()))
+            future = waiters.popleft()
+            if waiters:
+                self._queues.move_to_end(key)
+            else:
+                del self._queues[key]
+            self.queued -= 1
+            if not future.done():
+                self.in_flight += 1
+                future.set_result(None)
+        _queue_depth.set(self.queued)
+
+    @asynccontextmanager
+    async def admit(self, key: str):
+        """Hold an inference slot for the duration of the block"""
+        queued_at = time.perf_counter()
+        await self.acquire(key)
+        start = time.perf_counter()
+        _queue_timer.observe(start - queued_at)
+        try:
+            yield
+        finally:
+            self.release(time.perf_counter() - start)
+
+
+def client_key(request: Request) -> str:
+    """Fair-queuing key: the bearer token's user when it verifies, else the client IP"""
+    authorization = request.headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() == "bearer" and token:
+        username = decode_access_token(token)
+        if username is not None:
+            return f"user:{username}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
@@ -1,6 +1,10 @@
 from pydantic_settings import BaseSettings
 from pydantic import ConfigDict
 from typing import Optional
+import os
+
+# Relative file settings (model, tuning file, profiles, ...) are resolved against this directory
+BACKEND_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 
 
 class Settings(BaseSettings):
@@ -21,6 +25,31 @@ class Settings(BaseSettings):
 
     # ML Model
     MODEL_PATH: str = "sign_language_model.keras"
+    MODEL_WATCH_INTERVAL_SECONDS: float = 0.0  # > 0 reloads the model when its file changes
+    # X-Admin-Token for /api/admin/model (disabled when unset). Admin reloads only reach the
+    # worker process that serves them; with several workers use MODEL_WATCH_INTERVAL_SECONDS
+    ADMIN_TOKEN: Optional[str] = None
+    GESTURE_INDEX_PATH: str = "gesture_index.npz"  # built by build_gesture_index.py
+
+    # Inference runtime (per-host values are written by autotune.py to INFERENCE_TUNING_FILE)
+    INFERENCE_MAX_BATCH_SIZE: int = 32
+    INFERENCE_BATCH_WINDOW_MS: float = 2.0
+    INFERENCE_WORKERS: int = 1
+    TF_INTRA_OP_THREADS: int = 0  # 0 = TensorFlow default
+    TF_INTER_OP_THREADS: int = 0
+    INFERENCE_TUNING_FILE: str = "inference_tuning.json"
+
+    # Admission control for /api/predict (requests that would miss the deadline get a 503)
+    PREDICT_MAX_CONCURRENCY: int = 64  # requests in inference at once
+    PREDICT_MAX_QUEUE_DEPTH: int = 256  # requests waiting for a slot, across all clients
+    PREDICT_DEADLINE_MS: float = 1000.0  # longest a request may wait for a slot
+
+    # Profiling (off unless a token or a sample rate is set)
+    PROFILE_TOKEN: Optional[str] = None  # requests with a matching X-Profile header are profiled
+    PROFILE_SAMPLE_RATE: float = 0.0  # fraction of requests profiled at random
+    PROFILE_INTERVAL_MS: float = 1.0
+    PROFILE_DIR: str = "profiles"
+    PROFILE_MAX_FILES: int = 200
 
     model_config = ConfigDict(
         env_file=".env",
@@ -29,3 +58,10 @@ class Settings(BaseSettings):
 
 
 settings = Settings()
+
+
+def resolve_backend_path(path: str) -> str:
+    """Resolve a path relative to the backend root; absolute paths are returned unchanged"""
+    if os.path.isabs(path):
+        return path
+    return os.path.join(BACKEND_ROOT, path)
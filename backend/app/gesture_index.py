@@ -0,0 +1,122 @@
+# Per-letter nearest-neighbour index of reference gestures
+import os
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .config import settings, resolve_backend_path
+
+NUM_LANDMARKS = 21
+
+# Index modes: normalized landmark coordinates, or the model's penultimate-layer activations
+LANDMARKS = "landmarks"
+EMBEDDING = "embedding"
+
+
+def normalize_landmarks(landmarks: np.ndarray) -> np.ndarray:
+    """Center hands on the wrist and scale them to unit size.
+
+    Accepts (21, 3), (63,), (N, 21, 3), (N, 63) or (N, 63, 1) and returns (N, 63)
+    float32, so the same sign made nearer or further from the camera matches.
+    """
+    points = np.asarray(landmarks, dtype=np.float32).reshape(-1, NUM_LANDMARKS, 3)
+    points = points - points[:, :1, :]
+    scale = np.linalg.norm(points, axis=2).max(axis=1)
+    points = points / np.where(scale > 0, scale, 1.0)[:, None, None]
+    return points.reshape(len(points), NUM_LANDMARKS * 3)
+
+
+def make_embedding_fn(model) -> Callable[[np.ndarray], np.ndarray]:
+    """Compile the model without its output layer, for (batch, 63, 1) inputs"""
+    import tensorflow as tf
+
+    layers = model.layers[:-1]
+
+    @tf.function(input_signature=[tf.TensorSpec(shape=(None, 63, 1), dtype=tf.float32)])
+    def embed(x):
+        for layer in layers:
+            x = layer(x, training=False)
+        return x
+
+    return lambda batch: embed(batch).numpy()
+
+
+class GestureIndex:
+    """Reference vectors sorted by letter, queried for each letter's closest reference.
+
+    Vectors of one letter are stored contiguously, so per-letter minimum distances
+    are a single np.minimum.reduceat over the distances to all references.
+    """
+
+    def __init__(self, vectors: np.ndarray, labels: np.ndarray, letters: Sequence[str],
+                 mode: str = LANDMARKS, model_version: Optional[str] = None):
+        order = np.argsort(labels, kind="stable")
+        labels = np.asarray(labels)[order]
+        self.vectors = np.ascontiguousarray(np.asarray(vectors, dtype=np.float32)[order])
+        self.squared_norms = np.einsum("ij,ij->i", self.vectors, self.vectors)
+        present, self.offsets = np.unique(labels, return_index=True)
+        self.letters = [letters[i] for i in present]
+        self.labels = labels
+        self.all_letters = list(letters)
+        self.mode = mode
+        self.model_version = model_version
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    def letter_distances(self, vectors: np.ndarray) -> np.ndarray:
+        """Distance from each query vector to the closest reference of every indexed letter"""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.vectors.shape[1])
+        # |r - q|^2 = |r|^2 - 2 r.q + |q|^2, one matrix product for all references
+        squared = self.squared_norms[None, :] - 2.0 * vectors @ self.vectors.T
+        squared = np.minimum.reduceat(squared, self.offsets, axis=1)
+        squared += np.einsum("ij,ij->i", vectors, vectors)[:, None]
+        return np.sqrt(np.maximum(squared, 0.0))
+
+    def query(self, vector: np.ndarray, k: int = 5) -> List[Tuple[str, float]]:
+        """The k closest letters to one query vector, nearest first"""
+        distances = self.letter_distances(vector)[0]
+        k = min(k, len(distances))
+        nearest = np.argpartition(distances, k - 1)[:k]
+        nearest = nearest[np.argsort(distances[nearest])]
+        return [(self.letters[i], float(distances[i])) for i in nearest]
+
+    def save(self, path: str):
+        np.savez(
+            path,
+            vectors=self.vectors,
+            labels=self.labels,
+            letters=np.array(self.all_letters),
+            mode=np.array(self.mode),
+            model_version=np.array(self.model_version or ""),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "GestureIndex":
+        with np.load(path) as data:
+            return cls(
+                data["vectors"],
+                data["labels"],
+                [str(letter) for letter in data["letters"]],
+                mode=str(data["mode"]),
+                model_version=str(data["model_version"]) or None,
+            )
+
+
+def resolve_index_path(path: Optional[str] = None) -> str:
+    return resolve_backend_path(path or settings.GESTURE_INDEX_PATH)
+
+
+def load_gesture_index(path: Optional[str] = None) -> Optional[GestureIndex]:
+    """Load the reference index if one has been built; similarity lookups are off without it"""
+    path = resolve_index_path(path)
+    if not os.path.exists(path):
+        print(f"Gesture index not found at {path}, similarity lookups disabled")
+        return None
+    try:
+        index = GestureIndex.load(path)
+    except Exception as e:
+        print(f"❌ Error loading gesture index: {str(e)}")
+        return None
+    print(f"✅ Gesture index loaded: {len(index)} {index.mode} references for {len(index.letters)} letters")
+    return index
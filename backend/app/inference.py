@@ -0,0 +1,202 @@
+# Batched inference runtime for the prediction endpoint
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+from .config import settings, resolve_backend_path
+from .metrics import INFERENCE_BATCH_SIZE
+
+# Settings the autotuner may override per host (see autotune.py)
+TUNABLE_SETTINGS = (
+    "INFERENCE_MAX_BATCH_SIZE",
+    "INFERENCE_BATCH_WINDOW_MS",
+    "INFERENCE_WORKERS",
+    "TF_INTRA_OP_THREADS",
+    "TF_INTER_OP_THREADS",
+)
+
+_batch_size = INFERENCE_BATCH_SIZE.labels()
+
+
+def resolve_tuning_path(path: Optional[str] = None) -> str:
+    return resolve_backend_path(path or settings.INFERENCE_TUNING_FILE)
+
+
+def load_tuning(path: Optional[str] = None) -> dict:
+    """Apply an autotune result to settings; values set explicitly in the environment win"""
+    path = resolve_tuning_path(path)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path) as f:
+            config = json.load(f).get("config", {})
+    except (OSError, ValueError) as e:
+        print(f"❌ Error reading inference tuning file {path}: {str(e)}")
+        return {}
+
+    applied = {}
+    for name in TUNABLE_SETTINGS:
+        if name in config and name not in settings.model_fields_set:
+            setattr(settings, name, type(getattr(settings, name))(config[name]))
+            applied[name] = getattr(settings, name)
+    if applied:
+        print(f"✅ Applied inference tuning from {path}: {applied}")
+    return applied
+
+
+def configure_tensorflow_threads():
+    """Set TensorFlow thread pools from settings; only possible before TensorFlow initializes"""
+    import tensorflow as tf
+    try:
+        if settings.TF_INTRA_OP_THREADS:
+            tf.config.threading.set_intra_op_parallelism_threads(settings.TF_INTRA_OP_THREADS)
+        if settings.TF_INTER_OP_THREADS:
+            tf.config.threading.set_inter_op_parallelism_threads(settings.TF_INTER_OP_THREADS)
+    except RuntimeError as e:
+        print(f"❌ TensorFlow thread settings not applied: {str(e)}")
+
+
+def make_predict_fn(model) -> Callable[[np.ndarray], np.ndarray]:
+    """Compile a direct model call for (batch, 63, 1) inputs.
+
+    model.predict() builds a new data pipeline on every call, which costs tens of
+    milliseconds per request; a traced call with a fixed signature does not.
+    """
+    import tensorflow as tf
+
+    serving_call = tf.function(
+        lambda x: model(x, training=False),
+        input_signature=[tf.TensorSpec(shape=(None, 63, 1), dtype=tf.float32)],
+    )
+    return lambda batch: serving_call(batch).numpy()
+
+
+def model_file_version(path: str) -> str:
+    """Content hash identifying a model file"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+def warm_up(predict_fn: Callable[[np.ndarray], np.ndarray], max_batch_size: int):
+    """Run a compiled model once per batch shape it will see first, so tracing and
+    TensorFlow's lazy initialization do not land on real requests"""
+    for batch_size in sorted({1, max_batch_size}):
+        predict_fn(np.zeros((batch_size, 63, 1), dtype=np.float32))
+
+
+class LoadedModel:
+    """A deserialized model together with its compiled call and version"""
+
+    def __init__(self, model, predict_fn: Callable[[np.ndarray], np.ndarray], version: str, path: str):
+        self.model = model
+        self.predict_fn = predict_fn
+        self.version = version
+        self.path = path
+        self.loaded_at = time.time()
+
+
+class InferenceBatcher:
+    """Groups concurrent single-frame requests into model batches.
+
+    A batch is sent once max_batch_size requests are waiting or batch_window_ms
+    after the first one arrived, on one of `workers` inference threads. When all
+    workers are busy, requests keep accumulating and go out as soon as one frees
+    up, so batches grow with load instead of queueing one by one.
+    """
+
+    def __init__(self, predict_fn: Callable[[np.ndarray], np.ndarray], max_batch_size: int = 32,
+                 batch_window_ms: float = 2.0, workers: int = 1, version: Optional[str] = None):
+        # Replaced as one tuple so a batch never pairs one model with another's version
+        self._active = (predict_fn, version)
+        self.max_batch_size = max(1, max_batch_size)
+        self.batch_window = max(0.0, batch_window_ms) / 1000
+        self.workers = max(1, workers)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inference")
+        self._pending = deque()
+        self._in_flight = 0
+        self._timer = None
+        self._tasks = set()
+
+    @classmethod
+    def from_settings(cls, predict_fn: Callable[[np.ndarray], np.ndarray],
+                      version: Optional[str] = None) -> "InferenceBatcher":
+        return cls(
+            predict_fn,
+            max_batch_size=settings.INFERENCE_MAX_BATCH_SIZE,
+            batch_window_ms=settings.INFERENCE_BATCH_WINDOW_MS,
+            workers=settings.INFERENCE_WORKERS,
+            version=version,
+        )
+
+    @property
+    def predict_fn(self) -> Callable[[np.ndarray], np.ndarray]:
+        return self._active[0]
+
+    @property
+    def version(self) -> Optional[str]:
+        return self._active[1]
+
+    def swap(self, predict_fn: Callable[[np.ndarray], np.ndarray], version: Optional[str]):
+        """Serve a different model from the next batch on; batches in flight finish on the old one"""
+        self._active = (predict_fn, version)
+
+    async def predict(self, sample: np.ndarray) -> Tuple[np.ndarray, Optional[str]]:
+        """Return the class probabilities for one (63, 1) sample and the model version that produced them"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((sample, future))
+        if len(self._pending) >= self.max_batch_size or self.batch_window == 0:
+            self._dispatch(loop, flush_partial=self.batch_window == 0)
+        elif self._timer is None:
+            self._timer = loop.call_later(self.batch_window, self._on_window_expired, loop)
+        return await future
+
+    def _on_window_expired(self, loop):
+        self._timer = None
+        self._dispatch(loop, flush_partial=True)
+
+    def _dispatch(self, loop, flush_partial: bool):
+        while self._pending and self._in_flight < self.workers:
+            if len(self._pending) < self.max_batch_size and not flush_partial:
+                break
+            items = [self._pending.popleft() for _ in range(min(self.max_batch_size, len(self._pending)))]
+            self._in_flight += 1
+            task = loop.create_task(self._run_batch(loop, items))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+        if self._timer is not None and (not self._pending or self._in_flight >= self.workers):
+            self._timer.cancel()
+            self._timer = None
+
+    async def _run_batch(self, loop, items):
+        try:
+            batch = np.stack([sample for sample, _ in items])
+            # Read once per batch, so a swapped model takes effect between batches
+            predict_fn, version = self._active
+            probabilities = await loop.run_in_executor(self._executor, predict_fn, batch)
+            _batch_size.observe(len(items))
+            for (_, future), row in zip(items, probabilities):
+                if not future.done():
+                    future.set_result((row, version))
+        except Exception as e:
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self._in_flight -= 1
+            # Requests that queued while every worker was busy have already waited long enough
+            self._dispatch(loop, flush_partial=True)
+
+    def close(self):
+        self._executor.shutdown(wait=False)
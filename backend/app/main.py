@@ -1,10 +1,17 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
+import asyncio
 
 from .config import settings
 from .database import init_db
-from .routers import auth, prediction, course
+from .inference import load_tuning
+from .gesture_index import load_gesture_index
+from .readiness import readiness, IN_PROGRESS, READY, FAILED
+from .metrics import MetricsMiddleware, registry, CONTENT_TYPE_LATEST
+from .profiling import ProfilingMiddleware, profiling_enabled
+from .routers import auth, prediction, course, profiling, admin
 import warnings
 
 warnings.filterwarnings('ignore', category=FutureWarning, module='keras')
@@ -12,13 +19,35 @@ warnings.filterwarnings('ignore', category=FutureWarning, module='keras')
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan events for startup and shutdown"""
-    # Startup: Initialize database and load ML modelp
+    # Startup: load and warm the ML model in the background (TensorFlow is only imported
+    # there) while the database is initialized, so non-ML routes serve right away
     print("Starting up...")
-    init_db()
-    prediction.load_model()
+    readiness.reset()
+    load_tuning()
+    model_task = asyncio.create_task(prediction.load_model_in_background())
+    watch_task = None
+    if settings.MODEL_WATCH_INTERVAL_SECONDS > 0:
+        watch_task = asyncio.create_task(prediction.watch_model_file(settings.MODEL_WATCH_INTERVAL_SECONDS))
+
+    prediction.gesture_index = await asyncio.to_thread(load_gesture_index)
+
+    readiness.set("database", IN_PROGRESS)
+    try:
+        await asyncio.to_thread(init_db)
+        readiness.set("database", READY)
+    except Exception as e:
+        print(f"❌ Error initializing database: {str(e)}")
+        readiness.set("database", FAILED, str(e))
+
     yield
     # Shutdown
     print("Shutting down...")
+    if not model_task.done():
+        model_task.cancel()
+    if watch_task is not None:
+        watch_task.cancel()
+    if prediction.batcher is not None:
+        prediction.batcher.close()
 
 
 # Create FastAPI application
@@ -38,10 +67,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Profile selected requests (only installed when enabled, so it is free when off)
+if profiling_enabled():
+    app.add_middleware(ProfilingMiddleware)
+
+# Record request counts, latency and DB time (outermost, so CORS preflights are counted too)
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(prediction.router)
 app.include_router(course.router)
+app.include_router(profiling.router)
+app.include_router(admin.router)
 
 
 @app.get("/")
@@ -60,6 +98,21 @@ def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/ready")
+def readiness_check():
+    """Readiness probe: 200 once the database, model and warmup are all ready"""
+    return JSONResponse(
+        content=readiness.snapshot(),
+        status_code=200 if readiness.ready else 503
+    )
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus metrics endpoint"""
+    return Response(content=registry.render(), media_type=CONTENT_TYPE_LATEST)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
@@ -0,0 +1,209 @@
+# On-demand request profiling with a sampling stack profiler
+#
+# Profiles are process-wide: every busy thread is sampled while the selected
+# request runs, because async requests share the event loop thread and sync
+# endpoints run on anonymous threadpool threads. Each profile records how many
+# requests were in flight, so a profile taken under concurrency can be told apart
+# from one of the request alone.
+import hmac
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from typing import List, Optional
+
+from .config import settings, resolve_backend_path
+from .metrics import HTTP_REQUESTS_IN_PROGRESS
+
+PROFILE_HEADER = b"x-profile"
+
+# Leaf frames of threads that are parked waiting for work (idle threadpool
+# workers, the event loop blocked in select) are not interesting
+_IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+}
+
+# Only one request is profiled at a time so sampling never stacks up under load
+_profile_lock = threading.Lock()
+
+_requests_in_progress = HTTP_REQUESTS_IN_PROGRESS.labels()
+
+
+def profiling_enabled() -> bool:
+    """Profiling is active when a token or a sample rate is configured"""
+    return bool(settings.PROFILE_TOKEN) or settings.PROFILE_SAMPLE_RATE > 0
+
+
+def get_profile_dir() -> str:
+    return resolve_backend_path(settings.PROFILE_DIR)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler(threading.Thread):
+    """Background thread sampling the Python stacks of all busy threads in the process"""
+
+    def __init__(self, interval: float):
+        super().__init__(name="stack-sampler", daemon=True)
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.max_requests_in_progress = int(_requests_in_progress.value)
+        self._stop_event = threading.Event()
+        self._on_finish = None
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self._sample()
+        if self._on_finish is not None:
+            self._on_finish(self)
+
+    def _sample(self):
+        own_ident = threading.get_ident()
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_ident:
+                continue
+            leaf = (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name)
+            if leaf in _IDLE_FRAMES:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+        self.samples += 1
+        self.max_requests_in_progress = max(self.max_requests_in_progress, int(_requests_in_progress.value))
+
+    def stop(self, on_finish=None):
+        """Stop sampling; on_finish runs on the sampler thread so the caller never blocks on I/O"""
+        self._on_finish = on_finish
+        self._stop_event.set()
+
+
+def _slugify(route: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "root"
+
+
+def write_profile(sampler: StackSampler, method: str, route: str, status_code: int, duration: float) -> str:
+    """Write collapsed stacks plus a JSON metadata sidecar and prune old profiles"""
+    profile_dir = get_profile_dir()
+    os.makedirs(profile_dir, exist_ok=True)
+    created_at = time.time()
+    name = f"{int(created_at * 1000)}_{method}_{_slugify(route)}"
+
+    with open(os.path.join(profile_dir, f"{name}.collapsed"), "w") as f:
+        for stack, count in sampler.stacks.most_common():
+            f.write(f"{stack} {count}\n")
+
+    metadata = {
+        "name": name,
+        "method": method,
+        "route": route,
+        "status_code": status_code,
+        "duration_ms": round(duration * 1000, 3),
+        "samples": sampler.samples,
+        "created_at": created_at,
+        # Stacks of every request in flight are included, not only this one
+        "scope": "process",
+        "max_requests_in_progress": sampler.max_requests_in_progress,
+    }
+    with open(os.path.join(profile_dir, f"{name}.json"), "w") as f:
+        json.dump(metadata, f)
+
+    _prune_profiles(profile_dir)
+    return name
+
+
+def _prune_profiles(profile_dir: str):
+    names = sorted(f[:-5] for f in os.listdir(profile_dir) if f.endswith(".json"))
+    for name in names[:-settings.PROFILE_MAX_FILES]:
+        for suffix in (".json", ".collapsed"):
+            try:
+                os.remove(os.path.join(profile_dir, name + suffix))
+            except FileNotFoundError:
+                pass
+
+
+def list_profiles(limit: int = 50) -> List[dict]:
+    """Return metadata for the most recent profiles, newest first"""
+    profile_dir = get_profile_dir()
+    if not os.path.isdir(profile_dir):
+        return []
+    names = sorted((f for f in os.listdir(profile_dir) if f.endswith(".json")), reverse=True)
+    profiles = []
+    for filename in names[:limit]:
+        try:
+            with open(os.path.join(profile_dir, filename)) as f:
+                profiles.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return profiles
+
+
+def get_profile_path(name: str) -> Optional[str]:
+    """Return the collapsed stack file for a profile, or None if it does not exist"""
+    if os.path.basename(name) != name:
+        return None
+    path = os.path.join(get_profile_dir(), f"{name}.collapsed")
+    return path if os.path.isfile(path) else None
+
+
+def _should_profile(scope) -> bool:
+    if settings.PROFILE_TOKEN:
+        for key, value in scope["headers"]:
+            if key == PROFILE_HEADER:
+                return hmac.compare_digest(value, settings.PROFILE_TOKEN.encode())
+    return settings.PROFILE_SAMPLE_RATE > 0 and random.random() < settings.PROFILE_SAMPLE_RATE
+
+
+class ProfilingMiddleware:
+    """ASGI middleware running selected requests under the stack sampler.
+
+    Only installed when profiling_enabled() is true, so it costs nothing when off.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+        if not _profile_lock.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        sampler = StackSampler(settings.PROFILE_INTERVAL_MS / 1000)
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            route = getattr(scope.get("route"), "path", scope["path"])
+
+            def finish(finished_sampler):
+                try:
+                    write_profile(finished_sampler, scope["method"], route, status_code, duration)
+                finally:
+                    _profile_lock.release()
+
+            sampler.stop(on_finish=finish)
@@ -0,0 +1,49 @@
+# Startup progress of the components the API depends on
+import threading
+from typing import Dict, Optional
+
+PENDING = "pending"
+IN_PROGRESS = "in_progress"
+READY = "ready"
+FAILED = "failed"
+
+
+class Readiness:
+    """Thread-safe state of database, model and warmup initialization"""
+
+    COMPONENTS = ("database", "model", "warmup")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._states: Dict[str, str] = {component: PENDING for component in self.COMPONENTS}
+            self._errors: Dict[str, str] = {}
+
+    def set(self, component: str, state: str, error: Optional[str] = None):
+        with self._lock:
+            self._states[component] = state
+            if error is None:
+                self._errors.pop(component, None)
+            else:
+                self._errors[component] = error
+
+    def get(self, component: str) -> str:
+        return self._states[component]
+
+    @property
+    def ready(self) -> bool:
+        return all(state == READY for state in self._states.values())
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "status": "ready" if all(s == READY for s in self._states.values()) else "not_ready",
+                "components": dict(self._states),
+                "errors": dict(self._errors),
+            }
+
+
+readiness = Readiness()
@@ -0,0 +1,84 @@
+# Model administration. These endpoints act on the uvicorn worker process that
+# serves the request only: with --workers N, the other workers keep their model.
+# Multi-worker deployments should replace the model file in place and set
+# MODEL_WATCH_INTERVAL_SECONDS, so every worker picks the change up on its own.
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+import asyncio
+import hmac
+import os
+from typing import Optional
+
+from ..config import settings
+from ..inference import LoadedModel
+from ..schemas import ModelReloadRequest, ModelStatusResponse, ModelVersionInfo
+from . import prediction
+
+router = APIRouter(prefix="/api/admin", tags=["Admin"])
+
+
+def verify_admin_token(x_admin_token: Optional[str] = Header(default=None)):
+    """Dependency guarding admin operations with the X-Admin-Token header"""
+    # Header values arrive latin-1 decoded; compare the raw bytes in constant time
+    if not settings.ADMIN_TOKEN or x_admin_token is None or not hmac.compare_digest(
+        x_admin_token.encode("latin-1"), settings.ADMIN_TOKEN.encode()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access denied"
+        )
+
+
+def _version_info(loaded: Optional[LoadedModel]) -> Optional[ModelVersionInfo]:
+    if loaded is None:
+        return None
+    return ModelVersionInfo(version=loaded.version, path=loaded.path, loaded_at=loaded.loaded_at)
+
+
+def _model_status() -> ModelStatusResponse:
+    return ModelStatusResponse(
+        pid=os.getpid(),
+        active=_version_info(prediction.active_model),
+        previous=_version_info(prediction.previous_model)
+    )
+
+
+@router.get("/model", response_model=ModelStatusResponse, dependencies=[Depends(verify_admin_token)])
+def get_model_status():
+    """Show this worker process's serving model version and the one kept for rollback"""
+    return _model_status()
+
+
+@router.post("/model/reload", response_model=ModelStatusResponse, dependencies=[Depends(verify_admin_token)])
+async def reload_model(reload_data: Optional[ModelReloadRequest] = None):
+    """Load and warm a model file, then swap it in without dropping requests.
+
+    Only affects the worker process that serves this request (see `pid` in the
+    response); use MODEL_WATCH_INTERVAL_SECONDS to update every worker.
+    """
+    model_path = reload_data.model_path if reload_data is not None else None
+    try:
+        await asyncio.to_thread(prediction.reload_model, model_path)
+    except RuntimeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error loading model, previous model still serving: {str(e)}"
+        )
+    return _model_status()
+
+
+@router.post("/model/rollback", response_model=ModelStatusResponse, dependencies=[Depends(verify_admin_token)])
+def rollback_model():
+    """Swap the previous model back in, in this worker process only"""
+    try:
+        prediction.rollback_model()
+    except (LookupError, RuntimeError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    return _model_status()
@@ -1,112 +1,340 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Request, status
+import asyncio
 import numpy as np
 import os
-from typing import List
+import threading
+import time
+from typing import List, Optional
 
-from ..schemas import PredictionRequest, PredictionResponse
-from ..config import settings
+from ..schemas import PredictionRequest, PredictionResponse, SimilarityRequest, SimilarityResponse
+from ..config import settings, resolve_backend_path
+from ..metrics import PREDICTION_STAGE_DURATION, MODEL_INFO, MODEL_RELOADS_TOTAL
+from ..inference import (
+    InferenceBatcher, LoadedModel, configure_tensorflow_threads, make_predict_fn, model_file_version, warm_up
+)
+from ..readiness import readiness, IN_PROGRESS, READY, FAILED
+from ..admission import AdmissionController, Overloaded, client_key
+from ..gesture_index import EMBEDDING, GestureIndex, make_embedding_fn, normalize_landmarks
 
 router = APIRouter(prefix="/api", tags=["Prediction"])
 
 # Load the ML model at startup
 model = None
+batcher: Optional[InferenceBatcher] = None
+
+# Serving model and the one it replaced (kept loaded for instant rollback)
+active_model: Optional[LoadedModel] = None
+previous_model: Optional[LoadedModel] = None
+_swap_lock = threading.Lock()
+_reload_lock = threading.Lock()
+
+# Bounds concurrent predictions and sheds what cannot be served in time
+admission = AdmissionController.from_settings()
+
+# Reference gestures for similarity feedback (loaded at startup when built)
+gesture_index: Optional[GestureIndex] = None
+_embedding_fn = (None, None)  # (model version, compiled penultimate-layer call)
+
+
+def resolve_model_path(model_path: Optional[str] = None) -> str:
+    """Resolve a model path, defaulting to settings.MODEL_PATH"""
+    return resolve_backend_path(model_path or settings.MODEL_PATH)
+
+
+def get_custom_objects() -> dict:
+    """Custom layers and functions needed to deserialize models built from CNN.py"""
+    # Import custom layers - add backed_fast to path first
+    import sys
+    backend_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+    if backend_path not in sys.path:
+        sys.path.insert(0, backend_path)
+
+    # Import ALL custom objects
+    from CNN import (
+        NSLPredictionModel, NSLStudentModel, CustomConv1D, CustomMaxPooling1D, CustomDense,
+        custom_relu, custom_softmax, custom_categorical_crossentropy, custom_accuracy
+    )
+
+    return {
+        "NSLPredictionModel": NSLPredictionModel,
+        "NSLStudentModel": NSLStudentModel,
+        "CustomConv1D": CustomConv1D,
+        "CustomMaxPooling1D": CustomMaxPooling1D,
+        "CustomDense": CustomDense,
+        "custom_relu": custom_relu,
+        "custom_softmax": custom_softmax,
+        "custom_categorical_crossentropy": custom_categorical_crossentropy,
+        "custom_accuracy": custom_accuracy,
+    }
+
+
+def load_keras_model(model_path: Optional[str] = None):
+    """Load a Keras model file with all custom objects, raising on failure"""
+    custom_objects = get_custom_objects()
+
+    from tensorflow.keras.models import load_model as keras_load_model # type: ignore
+
+    model_path = resolve_model_path(model_path)
+
+    # Check if model file exists
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"Model file not found at: {model_path}")
+
+    # Load model with ALL custom objects
+    return keras_load_model(model_path, custom_objects=custom_objects)
+
+
+def load_model_version(model_path: Optional[str] = None) -> LoadedModel:
+    """Load and compile a model file without serving it yet"""
+    model_path = resolve_model_path(model_path)
+    loaded_model = load_keras_model(model_path)
+    return LoadedModel(loaded_model, make_predict_fn(loaded_model), model_file_version(model_path), model_path)
+
+
+def activate_model(loaded: LoadedModel):
+    """Serve `loaded` from the next batch on and keep the replaced model for rollback"""
+    global model, batcher, active_model, previous_model
+    with _swap_lock:
+        if batcher is None:
+            batcher = InferenceBatcher.from_settings(loaded.predict_fn, loaded.version)
+        else:
+            batcher.swap(loaded.predict_fn, loaded.version)
+        dropped = None
+        if active_model is not None and active_model is not loaded:
+            dropped = previous_model
+            previous_model = active_model
+            MODEL_INFO.labels(previous_model.version).set(0)
+        active_model = loaded
+        model = loaded.model
+        MODEL_INFO.labels(loaded.version).set(1)
+        # Only the serving and rollback versions keep a series
+        if dropped is not None and dropped.version not in (active_model.version, previous_model.version):
+            MODEL_INFO.remove(dropped.version)
 
 
 def load_model():
     """Load the Keras model"""
-    global model
+    global model, batcher
+    readiness.set("model", IN_PROGRESS)
     try:
-        # Import custom layers - add backed_fast to path first
-        import sys
-        backend_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
-        if backend_path not in sys.path:
-            sys.path.insert(0, backend_path)
-
-        # Import ALL custom objects
-        from CNN import (
-            NSLPredictionModel, CustomConv1D, CustomMaxPooling1D, CustomDense,
-            custom_relu, custom_softmax, custom_categorical_crossentropy, custom_accuracy
-        )
-        
-        import tensorflow as tf
-        from tensorflow.keras.models import load_model as keras_load_model # type: ignore
-
-        if settings.MODEL_PATH.startswith('/'):
-            model_path = settings.MODEL_PATH
-        else:
-            backed_fast_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
-            model_path = os.path.join(backed_fast_root, settings.MODEL_PATH)
-
-        # Check if model file exists
-        if not os.path.exists(model_path):
-            raise FileNotFoundError(f"Model file not found at: {model_path}")
-
-        # Load model with ALL custom objects
-        model = keras_load_model(
-            model_path,
-            custom_objects={
-                "NSLPredictionModel": NSLPredictionModel,
-                "CustomConv1D": CustomConv1D,
-                "CustomMaxPooling1D": CustomMaxPooling1D,
-                "CustomDense": CustomDense,
-                "custom_relu": custom_relu,
-                "custom_softmax": custom_softmax,
-                "custom_categorical_crossentropy": custom_categorical_crossentropy,
-                "custom_accuracy": custom_accuracy,
-            }
-        )
-        print(f"✅ Model loaded successfully!")
+        configure_tensorflow_threads()
+        activate_model(load_model_version())
+        readiness.set("model", READY)
+        print(f"✅ Model {active_model.version} loaded successfully!")
     except Exception as e:
         print(f"❌ Error loading model: {str(e)}")
         import traceback
         traceback.print_exc()
         model = None
+        batcher = None
+        readiness.set("model", FAILED, str(e))
+
+
+def warm_up_model():
+    """Warm up the serving model at startup, tracking progress in readiness"""
+    if batcher is None:
+        readiness.set("warmup", FAILED, "model not loaded")
+        return
+    readiness.set("warmup", IN_PROGRESS)
+    try:
+        warm_up(batcher.predict_fn, batcher.max_batch_size)
+        readiness.set("warmup", READY)
+        print(f"✅ Model warmed up")
+    except Exception as e:
+        print(f"❌ Error warming up model: {str(e)}")
+        readiness.set("warmup", FAILED, str(e))
+
+
+async def load_model_in_background():
+    """Load and warm the model on a worker thread while the app keeps serving"""
+    await asyncio.to_thread(load_model)
+    await asyncio.to_thread(warm_up_model)
+
+
+def reload_model(model_path: Optional[str] = None) -> LoadedModel:
+    """Load and warm a new model while the current one keeps serving, then swap it in.
+
+    Defaults to re-reading the active model's file. Raises RuntimeError if another
+    reload is running; on any failure the current model stays in service.
+    """
+    if not _reload_lock.acquire(blocking=False):
+        raise RuntimeError("A model reload is already in progress")
+    try:
+        if model_path is None and active_model is not None:
+            model_path = active_model.path
+        model_path = resolve_model_path(model_path)
+        if active_model is not None and model_file_version(model_path) == active_model.version:
+            return active_model
+
+        loaded = load_model_version(model_path)
+        warm_up(loaded.predict_fn, batcher.max_batch_size if batcher is not None else settings.INFERENCE_MAX_BATCH_SIZE)
+        activate_model(loaded)
+        readiness.set("model", READY)
+        readiness.set("warmup", READY)
+        MODEL_RELOADS_TOTAL.labels("reload", "success").inc()
+        print(f"✅ Model {loaded.version} from {model_path} now serving")
+        return loaded
+    except Exception:
+        MODEL_RELOADS_TOTAL.labels("reload", "failure").inc()
+        raise
+    finally:
+        _reload_lock.release()
+
+
+def rollback_model() -> LoadedModel:
+    """Swap the previous model back in; it is still loaded and warm, so this is immediate.
+
+    Raises RuntimeError while a reload is running (it would swap its model in
+    afterwards and undo the rollback) and LookupError if there is nothing to roll back to.
+    """
+    if not _reload_lock.acquire(blocking=False):
+        MODEL_RELOADS_TOTAL.labels("rollback", "failure").inc()
+        raise RuntimeError("A model reload is in progress")
+    try:
+        if previous_model is None:
+            MODEL_RELOADS_TOTAL.labels("rollback", "failure").inc()
+            raise LookupError("No previous model to roll back to")
+        restored = previous_model
+        activate_model(restored)
+        MODEL_RELOADS_TOTAL.labels("rollback", "success").inc()
+        print(f"✅ Rolled back to model {restored.version}")
+        return restored
+    finally:
+        _reload_lock.release()
+
+
+def _file_signature(path: str):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+async def watch_model_file(interval: float):
+    """Reload the model when the active model file changes on disk.
+
+    A change is only acted on once the file has looked the same for two polls in a
+    row, so a model that is still being copied into place is not loaded half-written.
+    """
+    loaded_signature = pending_signature = None
+    while True:
+        await asyncio.sleep(interval)
+        if active_model is None:
+            continue
+        path = active_model.path
+        signature = _file_signature(path)
+        if loaded_signature is None or loaded_signature[0] != path:
+            loaded_signature = (path, signature)
+            continue
+        if signature is None or signature == loaded_signature[1]:
+            pending_signature = None
+            continue
+        if signature != pending_signature:
+            pending_signature = signature
+            continue
+        try:
+            await asyncio.to_thread(reload_model, path)
+        except Exception as e:
+            print(f"❌ Error reloading changed model file {path}: {str(e)}")
+        loaded_signature = (path, signature)
+        pending_signature = None
+
+
+# Class index to character name
+class_names = [
+    "Ka", "Kha", "Ga", "Gha", "Nga",
+    "Cha", "Chha", "Ja", "Jha", "Yan",
+    "Ta", "Tha", "Da", "Dha", "Na",
+    "Taa", "Thaa", "Daa", "Dhaa", "Naa",
+    "Pa", "Pha", "Ba", "Bha", "Ma",
+    "Ya", "Ra", "La", "Wa",
+    "T_Sha", "M_Sha", "D_Sha", "Ha",
+    "Ksha", "Tra", "Gya"
+]
+
+# Stage histograms bound once so the hot path skips the label lookup
+_decode_timer = PREDICTION_STAGE_DURATION.labels(stage="decode")
+_preprocess_timer = PREDICTION_STAGE_DURATION.labels(stage="preprocess")
+_inference_timer = PREDICTION_STAGE_DURATION.labels(stage="inference")
+_postprocess_timer = PREDICTION_STAGE_DURATION.labels(stage="postprocess")
+
+
+def decode_landmarks(hand_landmarks: List[List[float]]) -> np.ndarray:
+    """Convert hand landmarks to a float32 numpy array"""
+    return np.array(hand_landmarks, dtype=np.float32)
+
+
+def preprocess_landmarks(hand_landmarks_array: np.ndarray) -> np.ndarray:
+    """Shape landmarks as a single-sample Conv1D input of shape (1, 63, 1)"""
+    # Flatten to shape (63,) - 21 landmarks × 3 coordinates
+    hand_landmarks_flattened = hand_landmarks_array.flatten()
+
+    # Reshape to (63, 1) for Conv1D input, then add batch dimension -> (1, 63, 1)
+    hand_landmarks_reshaped = hand_landmarks_flattened.reshape(63, 1)
+    return np.expand_dims(hand_landmarks_reshaped, axis=0)
+
+
+def postprocess_prediction(probabilities: np.ndarray):
+    """Map one row of class probabilities to (character, confidence)"""
+    predicted_class = int(np.argmax(probabilities))
+    confidence = float(probabilities[predicted_class])
+    predicted_character = class_names[predicted_class] if predicted_class < len(class_names) else "Unknown"
+    return predicted_character, confidence
 
 
 @router.post("/predict", response_model=PredictionResponse)
-async def predict_sign(prediction_data: PredictionRequest):
+async def predict_sign(prediction_data: PredictionRequest, request: Request):
     """Predict sign language character from hand landmarks"""
-    if model is None:
+    if model is None or batcher is None:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="ML model not loaded"
         )
 
     try:
-        # Convert hand landmarks to numpy array
-        hand_landmarks_array = np.array(prediction_data.hand_landmarks, dtype=np.float32)
+        async with admission.admit(client_key(request)):
+            return await run_prediction(prediction_data)
+    except Overloaded as e:
+        raise overloaded_error(e)
 
-        # Flatten to shape (63,) - 21 landmarks × 3 coordinates
-        hand_landmarks_flattened = hand_landmarks_array.flatten()
 
-        # Reshape to (63, 1) for Conv1D input, then add batch dimension -> (1, 63, 1)
-        hand_landmarks_reshaped = hand_landmarks_flattened.reshape(63, 1)
-        hand_landmarks_reshaped = np.expand_dims(hand_landmarks_reshaped, axis=0)
+def overloaded_error(e: Overloaded) -> HTTPException:
+    """503 telling a shed client when to retry"""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(e),
+        headers={"Retry-After": e.retry_after_header}
+    )
 
-        # Make prediction
-        predictions = model.predict(hand_landmarks_reshaped, verbose=0)
 
-        # Get the predicted class and confidence
-        predicted_class = np.argmax(predictions[0])
-        confidence = float(predictions[0][predicted_class])
+async def run_prediction(prediction_data: PredictionRequest) -> dict:
+    """Decode, preprocess, infer and postprocess one prediction request"""
+    try:
+        stage_start = time.perf_counter()
+        hand_landmarks_array = decode_landmarks(prediction_data.hand_landmarks)
+        stage_end = time.perf_counter()
+        _decode_timer.observe(stage_end - stage_start)
+        stage_start = stage_end
 
-        # Map class index to character name
-        class_names = [
-            "Ka", "Kha", "Ga", "Gha", "Nga",
-            "Cha", "Chha", "Ja", "Jha", "Yan",
-            "Ta", "Tha", "Da", "Dha", "Na",
-            "Taa", "Thaa", "Daa", "Dhaa", "Naa",
-            "Pa", "Pha", "Ba", "Bha", "Ma",
-            "Ya", "Ra", "La", "Wa",
-            "T_Sha", "M_Sha", "D_Sha", "Ha",
-            "Ksha", "Tra", "Gya"
-        ]
+        model_input = preprocess_landmarks(hand_landmarks_array)
+        stage_end = time.perf_counter()
+        _preprocess_timer.observe(stage_end - stage_start)
+        stage_start = stage_end
 
-        predicted_character = class_names[predicted_class] if predicted_class < len(class_names) else "Unknown"
+        # Make prediction (batched with concurrent requests)
+        probabilities, model_version = await batcher.predict(model_input[0])
+        stage_end = time.perf_counter()
+        _inference_timer.observe(stage_end - stage_start)
+        stage_start = stage_end
+
+        predicted_character, confidence = postprocess_prediction(probabilities)
+        _postprocess_timer.observe(time.perf_counter() - stage_start)
 
         return {
             "prediction": predicted_character,
-            "confidence": confidence
+            "confidence": confidence,
+            "model_version": model_version
         }
 
     except Exception as e:
@@ -114,3 +342,58 @@ async def predict_sign(prediction_data: PredictionRequest):
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error during prediction: {str(e)}"
         )
+
+
+def _get_embedding_fn(loaded: LoadedModel):
+    """Penultimate-layer call of `loaded`, compiled once per model version"""
+    global _embedding_fn
+    version, embedding_fn = _embedding_fn
+    if version != loaded.version:
+        embedding_fn = make_embedding_fn(loaded.model)
+        _embedding_fn = (loaded.version, embedding_fn)
+    return embedding_fn
+
+
+@router.post("/similar", response_model=SimilarityResponse)
+async def similar_letters(similarity_data: SimilarityRequest, request: Request):
+    """Closest reference letters to a hand pose, with their distances"""
+    index = gesture_index
+    if index is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Gesture index not loaded"
+        )
+
+    try:
+        hand_landmarks_array = decode_landmarks(similarity_data.hand_landmarks)
+        vector = normalize_landmarks(hand_landmarks_array)
+        if len(vector) != 1:
+            raise ValueError(f"expected 21 landmarks, got {len(vector) * 21}")
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid hand landmarks: {str(e)}"
+        )
+
+    # Landmark queries are a sub-millisecond numpy lookup and run inline; embedding
+    # queries run the model, so they share the prediction admission limits (they are
+    # not batched, since the batcher only runs the full model)
+    if index.mode == EMBEDDING:
+        loaded = active_model  # read once: a concurrent swap must not mix model versions
+        if loaded is None or loaded.version != index.model_version:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Gesture index was built for a different model version"
+            )
+        try:
+            async with admission.admit(client_key(request)):
+                # The model sees raw landmarks, as in /predict
+                vector = await asyncio.to_thread(_get_embedding_fn(loaded), hand_landmarks_array.reshape(1, 63, 1))
+        except Overloaded as e:
+            raise overloaded_error(e)
+
+    matches = index.query(vector, similarity_data.k)
+    return {
+        "matches": [{"letter": letter, "distance": distance} for letter, distance in matches],
+        "mode": index.mode
+    }
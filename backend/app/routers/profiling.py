@@ -0,0 +1,44 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import FileResponse
+import hmac
+from typing import List, Optional
+
+from ..config import settings
+from ..profiling import list_profiles, get_profile_path
+from ..schemas import ProfileInfo
+
+router = APIRouter(prefix="/api/profiles", tags=["Profiling"])
+
+
+def verify_profile_token(x_profile: Optional[str] = Header(default=None)):
+    """Dependency guarding profile access with the privileged X-Profile header"""
+    # Header values arrive latin-1 decoded; compare the raw bytes in constant time
+    if not settings.PROFILE_TOKEN or x_profile is None or not hmac.compare_digest(
+        x_profile.encode("latin-1"), settings.PROFILE_TOKEN.encode()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Profiling access denied"
+        )
+
+
+@router.get("", response_model=List[ProfileInfo], dependencies=[Depends(verify_profile_token)])
+def get_recent_profiles(limit: int = 50):
+    """List the most recent request profiles, newest first.
+
+    Profiles are process-wide: they hold the stacks of every request in flight
+    while the profiled one ran (see max_requests_in_progress), not only its own.
+    """
+    return list_profiles(limit)
+
+
+@router.get("/{name}", dependencies=[Depends(verify_profile_token)])
+def download_profile(name: str):
+    """Download the process-wide collapsed stacks of a profile (flamegraph.pl / speedscope format)"""
+    path = get_profile_path(name)
+    if path is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Profile not found: {name}"
+        )
+    return FileResponse(path, media_type="text/plain", filename=f"{name}.collapsed")
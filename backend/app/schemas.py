@@ -40,6 +40,56 @@ class PredictionRequest(BaseModel):
 class PredictionResponse(BaseModel):
     prediction: str
     confidence: float
+    model_version: Optional[str] = None
+
+    model_config = ConfigDict(protected_namespaces=())
+
+
+class SimilarityRequest(BaseModel):
+    hand_landmarks: List[List[float]] = Field(..., description="Array of hand landmark coordinates")
+    k: int = Field(default=5, ge=1, le=36, description="Number of closest letters to return")
+
+
+class SimilarLetter(BaseModel):
+    letter: str
+    distance: float
+
+
+class SimilarityResponse(BaseModel):
+    matches: List[SimilarLetter]
+    mode: str
+
+
+# Model Admin Schemas
+class ModelVersionInfo(BaseModel):
+    version: str
+    path: str
+    loaded_at: float
+
+
+class ModelStatusResponse(BaseModel):
+    pid: int  # the worker process this status (and any reload or rollback) applies to
+    active: Optional[ModelVersionInfo] = None
+    previous: Optional[ModelVersionInfo] = None
+
+
+class ModelReloadRequest(BaseModel):
+    model_path: Optional[str] = Field(default=None, description="Model file to load (defaults to the active model's path)")
+
+    model_config = ConfigDict(protected_namespaces=())
+
+
+# Profiling Schemas
+class ProfileInfo(BaseModel):
+    name: str
+    method: str
+    route: str
+    status_code: int
+    duration_ms: float
+    samples: int
+    created_at: float
+    scope: str = "process"
+    max_requests_in_progress: Optional[int] = None
 
 
 # Course Progress Schemas
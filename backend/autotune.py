@@ -0,0 +1,172 @@
+# Find the fastest inference runtime configuration for this host
+#
+#   python autotune.py --recorded data/val/s0_landmarks.npy --p99-budget-ms 50
+#
+# Loads the served model and sweeps TensorFlow thread pools, inference workers,
+# maximum batch size and batch window under simulated concurrent traffic
+# (synthetic frames, plus recorded landmark frames when given). The fastest
+# configuration whose p99 latency fits the budget is written to
+# settings.INFERENCE_TUNING_FILE, which the API applies at startup.
+import argparse
+import asyncio
+import itertools
+import json
+import multiprocessing as mp
+import os
+import platform
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.config import settings
+from app.inference import resolve_tuning_path
+from benchmarks.common import summarize
+
+NUM_FEATURES = 63
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",")]
+
+
+def _float_list(value: str) -> List[float]:
+    return [float(v) for v in value.split(",")]
+
+
+def load_samples(recorded: Optional[str], count: int = 4096) -> Dict[str, np.ndarray]:
+    """Synthetic frames always; recorded frames (memory-mapped .npy) when provided"""
+    samples = {"synthetic": np.random.default_rng(0).random((count, NUM_FEATURES, 1), dtype=np.float32)}
+    if recorded:
+        frames = np.load(recorded, mmap_mode="r")[:count]
+        samples["recorded"] = np.asarray(frames, dtype=np.float32).reshape(-1, NUM_FEATURES, 1)
+    return samples
+
+
+async def drive(batcher, samples: np.ndarray, concurrency: int, duration: float) -> Dict[str, float]:
+    """Closed-loop load: `concurrency` clients each send one frame at a time"""
+    latencies = []
+    deadline = time.perf_counter() + duration
+
+    async def client(offset: int):
+        index = offset
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            await batcher.predict(samples[index % len(samples)])
+            latencies.append(time.perf_counter() - start)
+            index += concurrency
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - start)
+
+
+def measure_thread_config(task: dict) -> List[dict]:
+    """Run in a fresh process: TensorFlow thread pools cannot change once initialized"""
+    settings.TF_INTRA_OP_THREADS = task["intra_op_threads"]
+    settings.TF_INTER_OP_THREADS = task["inter_op_threads"]
+
+    from app.inference import InferenceBatcher, configure_tensorflow_threads, make_predict_fn
+    from app.routers.prediction import load_keras_model
+
+    configure_tensorflow_threads()
+    predict_fn = make_predict_fn(load_keras_model(task["model"]))
+    samples = load_samples(task["recorded"])
+    for batch_size in sorted(set(task["max_batch_sizes"])):
+        predict_fn(samples["synthetic"][:batch_size])  # trace and warm up
+
+    results = []
+    for workers, max_batch_size, window_ms in itertools.product(
+        task["workers"], task["max_batch_sizes"], task["batch_windows_ms"]
+    ):
+        config = {
+            "INFERENCE_MAX_BATCH_SIZE": max_batch_size,
+            "INFERENCE_BATCH_WINDOW_MS": window_ms,
+            "INFERENCE_WORKERS": workers,
+            "TF_INTRA_OP_THREADS": task["intra_op_threads"],
+            "TF_INTER_OP_THREADS": task["inter_op_threads"],
+        }
+        for name, data in samples.items():
+            batcher = InferenceBatcher(predict_fn, max_batch_size, window_ms, workers)
+            try:
+                stats = asyncio.run(drive(batcher, data, task["concurrency"], task["duration"]))
+            finally:
+                batcher.close()
+            results.append({"config": config, "samples": name, **stats})
+            print(f"{config} [{name}]: {stats['throughput_per_s']:.0f}/s "
+                  f"p50 {stats['p50_ms']:.2f}ms p99 {stats['p99_ms']:.2f}ms", flush=True)
+    return results
+
+
+def pick_best(measurements: List[dict], p99_budget_ms: float) -> dict:
+    """Highest worst-case throughput among configs meeting the p99 budget on every sample set"""
+    by_config: Dict[str, List[dict]] = {}
+    for measurement in measurements:
+        by_config.setdefault(json.dumps(measurement["config"], sort_keys=True), []).append(measurement)
+
+    candidates = []
+    for key, runs in by_config.items():
+        candidates.append({
+            "config": json.loads(key),
+            "throughput_per_s": min(run["throughput_per_s"] for run in runs),
+            "p99_ms": max(run["p99_ms"] for run in runs),
+        })
+    within_budget = [c for c in candidates if c["p99_ms"] <= p99_budget_ms]
+    if within_budget:
+        return max(within_budget, key=lambda c: c["throughput_per_s"])
+    # Nothing meets the budget: take the best tail latency
+    return min(candidates, key=lambda c: c["p99_ms"])
+
+
+def main(argv=None):
+    cpu_count = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Autotune the inference runtime for this host")
+    parser.add_argument("--model", default=None, help="Model path (defaults to settings.MODEL_PATH)")
+    parser.add_argument("--recorded", default=None, help=".npy of recorded landmark frames")
+    parser.add_argument("--output", default=None, help="Defaults to settings.INFERENCE_TUNING_FILE")
+    parser.add_argument("--intra-op-threads", type=_int_list, default=sorted({1, max(1, cpu_count // 2), cpu_count}))
+    parser.add_argument("--inter-op-threads", type=_int_list, default=[1, 2])
+    parser.add_argument("--workers", type=_int_list, default=[1, 2])
+    parser.add_argument("--max-batch-sizes", type=_int_list, default=[8, 32, 64])
+    parser.add_argument("--batch-windows-ms", type=_float_list, default=[0.5, 2.0, 5.0])
+    parser.add_argument("--concurrency", type=int, default=32, help="Simulated concurrent clients")
+    parser.add_argument("--duration", type=float, default=2.0, help="Seconds per configuration")
+    parser.add_argument("--p99-budget-ms", type=float, default=50.0)
+    args = parser.parse_args(argv)
+
+    measurements = []
+    context = mp.get_context("spawn")
+    for intra_op, inter_op in itertools.product(args.intra_op_threads, args.inter_op_threads):
+        task = {
+            "model": args.model,
+            "recorded": args.recorded,
+            "intra_op_threads": intra_op,
+            "inter_op_threads": inter_op,
+            "workers": args.workers,
+            "max_batch_sizes": args.max_batch_sizes,
+            "batch_windows_ms": args.batch_windows_ms,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+        }
+        with context.Pool(1) as pool:
+            measurements.extend(pool.apply(measure_thread_config, (task,)))
+
+    best = pick_best(measurements, args.p99_budget_ms)
+    output = resolve_tuning_path(args.output)
+    with open(output, "w") as f:
+        json.dump({
+            "config": best["config"],
+            "throughput_per_s": best["throughput_per_s"],
+            "p99_ms": best["p99_ms"],
+            "p99_budget_ms": args.p99_budget_ms,
+            "host": platform.node(),
+            "cpu_count": cpu_count,
+            "created_at": time.time(),
+            "measurements": measurements,
+        }, f, indent=2)
+    print(f"✅ Best configuration {best['config']} "
+          f"({best['throughput_per_s']:.0f}/s, p99 {best['p99_ms']:.2f}ms) written to {output}")
+
+
+if __name__ == "__main__":
+    main()
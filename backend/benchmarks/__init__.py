@@ -0,0 +1 @@
+# Performance benchmarks (micro-benchmarks and HTTP load generator)
@@ -0,0 +1,71 @@
+# Command line entry point: python -m benchmarks {micro,load,compare}
+import argparse
+import json
+import os
+import sys
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="API performance benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    micro = subparsers.add_parser("micro", help="Run micro-benchmarks of hot functions")
+    micro.add_argument("--iterations", type=int, default=1000)
+    micro.add_argument("--output", default="bench_results.json")
+
+    load = subparsers.add_parser("load", help="Drive the app through uvicorn and report per-endpoint latency")
+    load.add_argument("--concurrency", type=int, default=16)
+    load.add_argument("--duration", type=float, default=10.0, help="Seconds per endpoint")
+    load.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    load.add_argument("--url", default=None, help="Benchmark an already running server instead")
+    load.add_argument("--only", nargs="*", default=None, help="Substrings of scenario names to run")
+    load.add_argument("--output", default="bench_results.json")
+
+    compare = subparsers.add_parser("compare", help="Flag regressions against a stored baseline")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    compare.add_argument("--threshold", type=float, default=0.10, help="Allowed relative change (0.10 = 10%%)")
+
+    args = parser.parse_args(argv)
+
+    # The app reads its settings at import time; default to a SQLite stand-in and a usable JWT algorithm
+    os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+    os.environ.setdefault("ALGORITHM", "HS256")
+
+    from .common import write_results, print_results, compare_results
+
+    if args.command == "micro":
+        from .micro import run_micro
+        results = run_micro(args.iterations)
+        print_results(results)
+        write_results(args.output, "micro", results)
+    elif args.command == "load":
+        from .load import run_load
+        results = run_load(args.concurrency, args.duration, args.workers, args.url, args.only)
+        print_results(results)
+        write_results(args.output, "load", results)
+    else:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+        regressions = compare_results(baseline, current, args.threshold)
+        for regression in regressions:
+            if regression["change_pct"] is None:
+                print(
+                    f"FAILED {regression['benchmark']}: {regression['baseline']} errors in baseline, "
+                    f"{regression['current']} in current run; latencies not compared"
+                )
+                continue
+            print(
+                f"REGRESSION {regression['benchmark']} {regression['metric']}: "
+                f"{regression['baseline']} -> {regression['current']} ({regression['change_pct']:+.1f}%)"
+            )
+        if not regressions:
+            print(f"No regressions beyond {args.threshold:.0%}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+import json
+import os
+import platform
+import statistics
+import time
+from typing import Callable, Dict, List, Optional
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def summarize(latencies: List[float], elapsed: Optional[float] = None) -> Dict[str, float]:
+    """Summarize latencies (seconds) as milliseconds plus throughput"""
+    values = sorted(latencies)
+    total = elapsed if elapsed is not None else sum(values)
+    return {
+        "count": len(values),
+        "throughput_per_s": round(len(values) / total, 3) if total > 0 else 0.0,
+        "mean_ms": round(statistics.fmean(values) * 1000, 4) if values else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 4),
+        "p95_ms": round(percentile(values, 95) * 1000, 4),
+        "p99_ms": round(percentile(values, 99) * 1000, 4),
+    }
+
+
+def run_benchmark(func: Callable[[], object], iterations: int, warmup: int = 10) -> Dict[str, float]:
+    """Time individual calls of func after a short warmup"""
+    for _ in range(warmup):
+        func()
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        call_start = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - call_start)
+    return summarize(latencies, time.perf_counter() - start)
+
+
+def environment_info() -> Dict[str, object]:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.time(),
+    }
+
+
+def write_results(path: str, suite: str, results: Dict[str, Dict[str, float]]):
+    """Write results as JSON, merging with other suites already in the file"""
+    document = {"environment": environment_info(), "results": {}}
+    if os.path.exists(path):
+        with open(path) as f:
+            document["results"] = json.load(f).get("results", {})
+    for name, stats in results.items():
+        document["results"][f"{suite}.{name}"] = stats
+    with open(path, "w") as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+
+
+def print_results(results: Dict[str, Dict[str, float]]):
+    print(f"{'benchmark':<40} {'count':>8} {'ops/s':>12} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}")
+    for name, stats in results.items():
+        if "skipped" in stats:
+            print(f"{name:<40} skipped: {stats['skipped']}")
+            continue
+        failed = f"  FAILED: {stats['errors']} errors {stats.get('statuses', {})}" if stats.get("errors") else ""
+        print(
+            f"{name:<40} {stats['count']:>8} {stats['throughput_per_s']:>12.1f} "
+            f"{stats['p50_ms']:>10.3f} {stats['p95_ms']:>10.3f} {stats['p99_ms']:>10.3f}{failed}"
+        )
+
+
+# Latency percentiles regress when they grow, throughput when it shrinks
+LATENCY_KEYS = ("p50_ms", "p95_ms", "p99_ms")
+THROUGHPUT_KEYS = ("throughput_per_s",)
+
+
+def compare_results(baseline: dict, current: dict, threshold: float = 0.10) -> List[Dict[str, object]]:
+    """Return a list of regressions beyond the relative threshold.
+
+    Failed requests make latencies meaningless (errors are usually fast), so a
+    scenario with errors on either side is reported as an "errors" regression
+    instead of having its percentiles compared.
+    """
+    regressions = []
+    baseline_results = baseline.get("results", {})
+    for name, stats in current.get("results", {}).items():
+        reference = baseline_results.get(name)
+        if not reference or "skipped" in stats or "skipped" in reference:
+            continue
+        if stats.get("errors") or reference.get("errors"):
+            regressions.append({
+                "benchmark": name,
+                "metric": "errors",
+                "baseline": reference.get("errors", 0),
+                "current": stats.get("errors", 0),
+                "change_pct": None,
+            })
+            continue
+        for key in LATENCY_KEYS + THROUGHPUT_KEYS:
+            old, new = reference.get(key), stats.get(key)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            regressed = change > threshold if key in LATENCY_KEYS else change < -threshold
+            if regressed:
+                regressions.append({
+                    "benchmark": name,
+                    "metric": key,
+                    "baseline": old,
+                    "current": new,
+                    "change_pct": round(change * 100, 1),
+                })
+    return regressions
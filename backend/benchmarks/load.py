@@ -0,0 +1,173 @@
+# HTTP load generator driving the app through uvicorn against a SQLite stand-in
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+import httpx
+import numpy as np
+
+from .common import summarize
+
+BACKEND_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+BENCH_USER = {"username": "loadtest", "email": "loadtest@example.com", "password": "loadtest-password"}
+
+# (name, method, path, authenticated, needs the model)
+SCENARIOS = [
+    ("GET /health", "GET", "/health", False, False),
+    ("POST /api/auth/login", "POST", "/api/auth/login", False, False),
+    ("GET /api/course-counts", "GET", "/api/course-counts", True, False),
+    ("POST /api/course/{course_name}", "POST", "/api/course/Ka", True, False),
+    ("POST /api/predict", "POST", "/api/predict", False, True),
+]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int, database_path: str, workers: int = 1) -> subprocess.Popen:
+    """Start uvicorn in a subprocess so the load generator does not share its GIL"""
+    env = dict(os.environ)
+    env["DATABASE_URL"] = f"sqlite:///{database_path}"
+    env.setdefault("ALGORITHM", "HS256")
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        cwd=BACKEND_ROOT,
+        env=env,
+    )
+
+
+def wait_until_healthy(base_url: str, timeout: float = 120.0):
+    """Wait for /health, which answers before the model has loaded (see wait_until_ready)"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not become healthy within {timeout}s")
+
+
+async def wait_until_ready(client: httpx.AsyncClient, timeout: float = 120.0, consecutive: int = 3) -> Optional[dict]:
+    """Wait for /ready (model loaded and warm); returns the last readiness snapshot if it never got there.
+
+    Several ready answers in a row are required since with several uvicorn workers
+    each one loads its own model and /ready only reports the worker that answered.
+    """
+    deadline = time.time() + timeout
+    snapshot, ready_count = None, 0
+    while time.time() < deadline:
+        try:
+            response = await client.get("/ready", timeout=1.0)
+            snapshot = response.json()
+            ready_count = ready_count + 1 if response.status_code == 200 else 0
+            if ready_count >= consecutive:
+                return None
+        except (httpx.HTTPError, ValueError):
+            ready_count = 0
+        await asyncio.sleep(0.2)
+    return snapshot or {"status": "unreachable"}
+
+
+def _request_kwargs(name: str, token: Optional[str]) -> dict:
+    kwargs = {}
+    if token:
+        kwargs["headers"] = {"Authorization": f"Bearer {token}"}
+    if name == "POST /api/auth/login":
+        kwargs["data"] = {"username": BENCH_USER["username"], "password": BENCH_USER["password"]}
+    elif name == "POST /api/predict":
+        kwargs["json"] = {"hand_landmarks": np.random.default_rng(0).random((21, 3)).tolist()}
+    return kwargs
+
+
+async def _drive(client: httpx.AsyncClient, method: str, path: str, kwargs: dict,
+                 concurrency: int, duration: float) -> Dict[str, object]:
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, **kwargs)
+                statuses[str(response.status_code)] += 1
+            except httpx.HTTPError as e:
+                statuses[type(e).__name__] += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    stats = summarize(latencies, elapsed)
+    stats["errors"] = sum(count for status, count in statuses.items() if not status.startswith(("2", "3")))
+    stats["statuses"] = dict(statuses)
+    return stats
+
+
+async def _run_scenarios(base_url: str, concurrency: int, duration: float,
+                         only: Optional[List[str]]) -> Dict[str, Dict[str, object]]:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        await client.post("/api/auth/register", json=BENCH_USER)
+        login = await client.post("/api/auth/login", data={
+            "username": BENCH_USER["username"], "password": BENCH_USER["password"]
+        })
+        token = login.json().get("access_token") if login.status_code == 200 else None
+
+        results = {}
+        model_checked, not_ready = False, None
+        for name, method, path, authenticated, needs_model in SCENARIOS:
+            if only and not any(selected in name for selected in only):
+                continue
+            if authenticated and token is None:
+                results[name] = {"skipped": f"login failed with status {login.status_code}"}
+                continue
+            if needs_model and not model_checked:
+                not_ready = await wait_until_ready(client)
+                model_checked = True
+            if needs_model and not_ready is not None:
+                results[name] = {"skipped": f"model never became ready: {not_ready}"}
+                continue
+            kwargs = _request_kwargs(name, token if authenticated else None)
+            results[name] = await _drive(client, method, path, kwargs, concurrency, duration)
+        return results
+
+
+def run_load(concurrency: int = 16, duration: float = 10.0, workers: int = 1,
+             base_url: Optional[str] = None, only: Optional[List[str]] = None) -> Dict[str, Dict[str, object]]:
+    """Run every scenario in turn and report throughput and latency percentiles per endpoint.
+
+    Starts a throwaway uvicorn server on a fresh SQLite database unless base_url is given.
+    """
+    if base_url is not None:
+        return asyncio.run(_run_scenarios(base_url, concurrency, duration, only))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        port = _free_port()
+        server = start_server(port, os.path.join(tmp_dir, "bench.db"), workers)
+        try:
+            url = f"http://127.0.0.1:{port}"
+            wait_until_healthy(url)
+            return asyncio.run(_run_scenarios(url, concurrency, duration, only))
+        finally:
+            server.terminate()
+            try:
+                server.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                # Stuck requests (e.g. waiting on the DB pool) can block graceful shutdown
+                server.kill()
+                server.wait()
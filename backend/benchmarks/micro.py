@@ -0,0 +1,125 @@
+# Micro-benchmarks for the hot functions behind the API endpoints
+import uuid
+from typing import Dict
+
+import numpy as np
+
+from .common import run_benchmark
+
+
+def _sample_landmarks():
+    rng = np.random.default_rng(0)
+    return rng.random((21, 3)).tolist()
+
+
+def bench_landmark_parsing(iterations: int) -> Dict[str, float]:
+    from app.schemas import PredictionRequest
+    from app.routers.prediction import decode_landmarks, preprocess_landmarks
+
+    payload = {"hand_landmarks": _sample_landmarks()}
+
+    def parse():
+        request = PredictionRequest.model_validate(payload)
+        return preprocess_landmarks(decode_landmarks(request.hand_landmarks))
+
+    return run_benchmark(parse, iterations)
+
+
+def bench_inference(iterations: int) -> Dict[str, Dict[str, float]]:
+    from app.inference import make_predict_fn
+    from app.routers import prediction
+    from app.routers.prediction import decode_landmarks, preprocess_landmarks
+
+    if prediction.model is None:
+        prediction.load_model()
+    if prediction.model is None:
+        return {"inference": {"skipped": "model could not be loaded"}}
+
+    # Same compiled call the batcher uses on the serving path
+    predict_fn = make_predict_fn(prediction.model)
+    model_input = preprocess_landmarks(decode_landmarks(_sample_landmarks()))
+    batch_input = np.repeat(model_input, 32, axis=0)
+    return {
+        "inference": run_benchmark(lambda: predict_fn(model_input), iterations),
+        "inference_batch32": run_benchmark(lambda: predict_fn(batch_input), iterations),
+    }
+
+
+def bench_gesture_similarity(iterations: int, references_per_letter: int = 1000,
+                             prototypes_per_letter: int = 256) -> Dict[str, Dict[str, float]]:
+    from app.gesture_index import GestureIndex, normalize_landmarks
+    from app.routers.prediction import class_names
+
+    rng = np.random.default_rng(0)
+    letters = len(class_names)
+    references = normalize_landmarks(rng.random((letters * references_per_letter, 21, 3), dtype=np.float32))
+    labels = np.repeat(np.arange(letters), references_per_letter)
+    query = normalize_landmarks(np.array(_sample_landmarks()))
+
+    # Baseline: scan every stored frame of every letter on each request
+    per_letter = [references[labels == letter] for letter in range(letters)]
+
+    def brute_force():
+        distances = [float(np.linalg.norm(frames - query, axis=1).min()) for frames in per_letter]
+        return sorted(zip(distances, class_names))[:5]
+
+    full_index = GestureIndex(references, labels, class_names)
+    prototypes = np.arange(letters * references_per_letter) % references_per_letter < prototypes_per_letter
+    prototype_index = GestureIndex(references[prototypes], labels[prototypes], class_names)
+    return {
+        "similarity_brute_force": run_benchmark(brute_force, iterations),
+        "similarity_index": run_benchmark(lambda: full_index.query(query, 5), iterations),
+        "similarity_index_prototypes": run_benchmark(lambda: prototype_index.query(query, 5), iterations),
+    }
+
+
+def bench_passwords(iterations: int) -> Dict[str, Dict[str, float]]:
+    from app.auth import verify_password, get_password_hash
+
+    hashed = get_password_hash("benchmark-password")
+    # Argon2 is deliberately slow; a tenth of the iterations is plenty for stable percentiles
+    hash_iterations = max(5, iterations // 10)
+    return {
+        "get_password_hash": run_benchmark(lambda: get_password_hash("benchmark-password"), hash_iterations, warmup=2),
+        "verify_password": run_benchmark(lambda: verify_password("benchmark-password", hashed), hash_iterations, warmup=2),
+    }
+
+
+def bench_decode_access_token(iterations: int) -> Dict[str, float]:
+    from app.auth import create_access_token, decode_access_token
+
+    token = create_access_token({"sub": "benchmark"})
+    return run_benchmark(lambda: decode_access_token(token), iterations)
+
+
+def bench_progress_increment(iterations: int) -> Dict[str, float]:
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+    from app.database import Base
+    from app.models import User, UserCourseProgress
+    from app.routers.course import increment_course_count
+
+    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    user = User(id=uuid.uuid4(), username="benchmark", email="benchmark@example.com", password="x")
+    db.add(user)
+    db.add(UserCourseProgress(user_id=user.id))
+    db.commit()
+
+    try:
+        return run_benchmark(lambda: increment_course_count("Ka", current_user=user, db=db), iterations)
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def run_micro(iterations: int) -> Dict[str, Dict[str, float]]:
+    results = {"landmark_parsing": bench_landmark_parsing(iterations)}
+    results.update(bench_passwords(iterations))
+    results["decode_access_token"] = bench_decode_access_token(iterations)
+    results["progress_increment"] = bench_progress_increment(iterations)
+    results.update(bench_gesture_similarity(iterations))
+    results.update(bench_inference(iterations))
+    return results
@@ -0,0 +1,109 @@
+# Build the per-letter reference gesture index served by /api/similar
+#
+#   python build_gesture_index.py data/train --max-per-letter 256
+#   python build_gesture_index.py data/train --mode embedding
+#
+# Reads the shard layout described in landmark_data.py. Each letter is sampled
+# evenly across shards and reduced to --max-per-letter k-means prototypes, so
+# queries stay sub-millisecond however large the training set is. "landmarks" mode indexes
+# wrist-centered, scale-normalized coordinates; "embedding" mode indexes the
+# served model's penultimate-layer activations and is tied to that model version.
+import argparse
+
+import numpy as np
+
+from CNN import alphabets
+from app.gesture_index import EMBEDDING, LANDMARKS, GestureIndex, normalize_landmarks, resolve_index_path
+from landmark_data import NUM_CLASSES, find_shards, labels_to_indices, read_shard
+
+
+def count_labels(prefixes) -> np.ndarray:
+    """Samples per letter across all shards (labels are memory-mapped, so this is cheap)"""
+    counts = np.zeros(NUM_CLASSES, dtype=np.int64)
+    for prefix in prefixes:
+        labels = labels_to_indices(np.asarray(np.load(f"{prefix}_labels.npy", mmap_mode="r")))
+        counts += np.bincount(labels, minlength=NUM_CLASSES)
+    return counts
+
+
+def sample_references(prefixes, sample_per_letter: int, embed_fn=None, seed: int = 0):
+    """Keep about sample_per_letter frames of every letter, drawn uniformly over all shards"""
+    rng = np.random.default_rng(seed)
+    counts = count_labels(prefixes)
+    keep_probability = np.minimum(1.0, sample_per_letter / np.maximum(counts, 1))
+
+    vectors, labels = [], []
+    for prefix in prefixes:
+        for landmarks, block_labels in read_shard(prefix):
+            keep = rng.random(len(block_labels)) < keep_probability[block_labels]
+            if not keep.any():
+                continue
+            landmarks, block_labels = landmarks[keep], block_labels[keep]
+            if embed_fn is None:
+                vectors.append(normalize_landmarks(landmarks))
+            else:
+                vectors.append(embed_fn(landmarks.reshape(-1, 63, 1)))
+            labels.append(block_labels)
+    return np.concatenate(vectors), np.concatenate(labels)
+
+
+def kmeans(vectors: np.ndarray, k: int, iterations: int = 20, seed: int = 0) -> np.ndarray:
+    """Plain Lloyd's k-means; returns up to k centroids"""
+    if len(vectors) <= k:
+        return vectors
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), k, replace=False)].copy()
+    squared_norms = np.einsum("ij,ij->i", vectors, vectors)
+    for _ in range(iterations):
+        distances = squared_norms[:, None] - 2.0 * vectors @ centroids.T + np.einsum("ij,ij->i", centroids, centroids)
+        assignment = distances.argmin(axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        sizes = np.bincount(assignment, minlength=k)
+        occupied = sizes > 0
+        centroids[occupied] = sums[occupied] / sizes[occupied, None]
+    return centroids
+
+
+def build_index(vectors: np.ndarray, labels: np.ndarray, max_per_letter: int, mode: str = LANDMARKS,
+                model_version: str = None) -> GestureIndex:
+    """Reduce every letter to at most max_per_letter prototypes (0 keeps all references)"""
+    if max_per_letter > 0:
+        reduced_vectors, reduced_labels = [], []
+        for letter in np.unique(labels):
+            prototypes = kmeans(vectors[labels == letter], max_per_letter, seed=int(letter))
+            reduced_vectors.append(prototypes)
+            reduced_labels.append(np.full(len(prototypes), letter))
+        vectors, labels = np.concatenate(reduced_vectors), np.concatenate(reduced_labels)
+    return GestureIndex(vectors.astype(np.float32), labels, alphabets, mode=mode, model_version=model_version)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the per-letter reference gesture index")
+    parser.add_argument("data_dir", help="Shard directory (see landmark_data.py)")
+    parser.add_argument("--output", default=None, help="Defaults to settings.GESTURE_INDEX_PATH")
+    parser.add_argument("--mode", choices=[LANDMARKS, EMBEDDING], default=LANDMARKS)
+    parser.add_argument("--model", default=None, help="Model for embedding mode (defaults to settings.MODEL_PATH)")
+    parser.add_argument("--max-per-letter", type=int, default=256, help="Prototypes per letter (0 = keep all)")
+    parser.add_argument("--sample-per-letter", type=int, default=20000, help="Frames per letter fed to k-means")
+    args = parser.parse_args(argv)
+
+    embed_fn = model_version = None
+    if args.mode == EMBEDDING:
+        from app.gesture_index import make_embedding_fn
+        from app.inference import model_file_version
+        from app.routers.prediction import load_keras_model, resolve_model_path
+        embed_fn = make_embedding_fn(load_keras_model(args.model))
+        model_version = model_file_version(resolve_model_path(args.model))
+
+    vectors, labels = sample_references(find_shards(args.data_dir), args.sample_per_letter, embed_fn)
+    index = build_index(vectors, labels, args.max_per_letter, args.mode, model_version)
+
+    output = resolve_index_path(args.output)
+    index.save(output)
+    print(f"✅ Gesture index with {len(index)} {args.mode} references for {len(index.letters)} letters "
+          f"written to {output}")
+
+
+if __name__ == "__main__":
+    main()
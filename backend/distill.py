@@ -0,0 +1,219 @@
+# Distil the served model into a compact NSLStudentModel
+#
+#   python distill.py data/train --val-dir data/val --output student_model.keras
+#
+# The student is trained on the teacher's softened softmax outputs (plus the hard
+# labels, weighted by --alpha), then its conv filters with the smallest L1 norms
+# are pruned away and the slimmer network is fine-tuned the same way. Data uses
+# the shard layout from train.py. A report compares accuracy, FLOPs, weight size
+# and latency of teacher and student.
+import argparse
+import json
+import math
+import os
+import time
+
+import numpy as np
+import tensorflow as tf
+
+from CNN import NSLStudentModel, CustomConv1D, CustomMaxPooling1D, CustomDense
+from app.routers.prediction import load_keras_model, resolve_model_path
+from benchmarks.common import run_benchmark
+from train import NUM_FEATURES, build_dataset, configure_threads
+
+EPSILON = 1e-7
+
+
+def soften(probabilities, temperature: float):
+    """Re-apply softmax at a temperature to probabilities (equivalent to softmax(logits / T))"""
+    return tf.nn.softmax(tf.math.log(tf.clip_by_value(probabilities, EPSILON, 1.0)) / temperature, axis=-1)
+
+
+def distillation_loss(teacher_probs, student_probs, labels, temperature: float, alpha: float):
+    """alpha * T^2 * KL(teacher_T || student_T) + (1 - alpha) * cross-entropy with the labels"""
+    teacher_soft = soften(teacher_probs, temperature)
+    student_soft = soften(student_probs, temperature)
+    kl = tf.reduce_sum(
+        teacher_soft * (tf.math.log(teacher_soft + EPSILON) - tf.math.log(student_soft + EPSILON)), axis=-1
+    )
+    hard = -tf.reduce_sum(labels * tf.math.log(tf.clip_by_value(student_probs, EPSILON, 1.0)), axis=-1)
+    return tf.reduce_mean(alpha * temperature ** 2 * kl + (1.0 - alpha) * hard)
+
+
+def distill(teacher, student, dataset, epochs: int, learning_rate: float, temperature: float, alpha: float):
+    optimizer = tf.keras.optimizers.Adam(learning_rate)
+
+    @tf.function
+    def train_step(x, y):
+        teacher_probs = teacher(x, training=False)
+        with tf.GradientTape() as tape:
+            student_probs = student(x, training=True)
+            loss = distillation_loss(teacher_probs, student_probs, y, temperature, alpha)
+        gradients = tape.gradient(loss, student.trainable_variables)
+        optimizer.apply_gradients(zip(gradients, student.trainable_variables))
+        return loss
+
+    for epoch in range(epochs):
+        start = time.perf_counter()
+        total_loss, batches = 0.0, 0
+        for x, y in dataset:
+            total_loss += float(train_step(x, y))
+            batches += 1
+        print(f"Epoch {epoch + 1}/{epochs}: distillation loss {total_loss / max(1, batches):.4f} "
+              f"({time.perf_counter() - start:.1f}s)")
+
+
+def build_student(conv1_filters: int, conv2_filters: int, dense_units: int) -> NSLStudentModel:
+    student = NSLStudentModel(conv1_filters, conv2_filters, dense_units)
+    student(tf.zeros((1, NUM_FEATURES, 1)))
+    return student
+
+
+def prune_conv_filters(student: NSLStudentModel, keep_ratio: float) -> NSLStudentModel:
+    """Structured pruning: drop whole conv filters with the smallest L1 norms.
+
+    Surviving weights are copied into a narrower student, slicing the input
+    channels of the following conv layer and the rows of the flattened dense layer.
+    """
+    conv1_kernel, conv1_bias = (w.numpy() for w in (student.conv1.kernel, student.conv1.bias))
+    conv2_kernel, conv2_bias = (w.numpy() for w in (student.conv2.kernel, student.conv2.bias))
+    dense1_kernel = student.dense1.kernel.numpy()
+
+    def strongest(kernel, ratio):
+        count = max(1, int(round(kernel.shape[-1] * ratio)))
+        norms = np.abs(kernel).sum(axis=(0, 1))
+        return np.sort(np.argsort(norms)[-count:])
+
+    keep1 = strongest(conv1_kernel, keep_ratio)
+    keep2 = strongest(conv2_kernel, keep_ratio)
+
+    pruned = build_student(len(keep1), len(keep2), student.dense_units)
+    pruned.conv1.kernel.assign(conv1_kernel[:, :, keep1])
+    pruned.conv1.bias.assign(conv1_bias[keep1])
+    pruned.conv2.kernel.assign(conv2_kernel[:, keep1, :][:, :, keep2])
+    pruned.conv2.bias.assign(conv2_bias[keep2])
+
+    # Flatten orders features as (position, channel)
+    positions = dense1_kernel.shape[0] // conv2_kernel.shape[-1]
+    dense1_kernel = dense1_kernel.reshape(positions, conv2_kernel.shape[-1], -1)[:, keep2, :]
+    pruned.dense1.kernel.assign(dense1_kernel.reshape(positions * len(keep2), -1))
+    pruned.dense1.bias.assign(student.dense1.bias.numpy())
+    pruned.dense2.kernel.assign(student.dense2.kernel.numpy())
+    pruned.dense2.bias.assign(student.dense2.bias.numpy())
+    return pruned
+
+
+def estimate_flops(model, input_length: int = NUM_FEATURES) -> int:
+    """Multiply-accumulate FLOPs (x2) per frame for the conv/pool/dense stacks used here"""
+    length, flops = input_length, 0
+    for layer in model.layers:
+        if isinstance(layer, (tf.keras.layers.Conv1D, CustomConv1D)):
+            kernel_size, in_channels, filters = layer.kernel.shape
+            if getattr(layer, "padding", "same") == "valid":
+                length = length - kernel_size + 1
+            flops += 2 * length * kernel_size * in_channels * filters
+        elif isinstance(layer, CustomMaxPooling1D):
+            length = math.ceil(length / layer.strides)
+        elif isinstance(layer, tf.keras.layers.MaxPooling1D):
+            pool_size, strides = layer.pool_size[0], layer.strides[0]
+            if layer.padding == "valid":
+                length = (length - pool_size) // strides + 1
+            else:
+                length = math.ceil(length / strides)
+        elif isinstance(layer, (tf.keras.layers.Dense, CustomDense)):
+            in_units, out_units = layer.kernel.shape
+            flops += 2 * in_units * out_units
+    return int(flops)
+
+
+def evaluate(model, teacher, dataset):
+    """Top-1 accuracy against labels and agreement with the teacher"""
+    correct = agree = total = 0
+    for x, y in dataset:
+        predicted = tf.argmax(model(x, training=False), axis=-1)
+        correct += int(tf.reduce_sum(tf.cast(predicted == tf.argmax(y, axis=-1), tf.int32)))
+        agree += int(tf.reduce_sum(tf.cast(predicted == tf.argmax(teacher(x, training=False), axis=-1), tf.int32)))
+        total += len(x)
+    return correct / max(1, total), agree / max(1, total)
+
+
+def profile_model(name: str, model, teacher, dataset, path: str, iterations: int) -> dict:
+    accuracy, agreement = evaluate(model, teacher, dataset)
+    single = np.random.default_rng(0).random((1, NUM_FEATURES, 1)).astype(np.float32)
+    batch = np.repeat(single, 256, axis=0)
+    serving_call = tf.function(lambda x: model(x, training=False))
+    return {
+        "model": name,
+        "accuracy": round(accuracy, 4),
+        "teacher_agreement": round(agreement, 4),
+        "flops_per_frame": estimate_flops(model),
+        "parameters": int(sum(np.prod(w.shape) for w in model.weights)),
+        "file_size_bytes": os.path.getsize(path),
+        "latency_single": run_benchmark(lambda: serving_call(single), iterations),
+        "latency_batch256": run_benchmark(lambda: serving_call(batch), max(10, iterations // 10)),
+    }
+
+
+def print_report(rows):
+    print(f"{'model':<10} {'acc':>7} {'agree':>7} {'MFLOPs':>8} {'params':>9} {'bytes':>10} "
+          f"{'p50 1 ms':>9} {'p50 256 ms':>11}")
+    for row in rows:
+        print(f"{row['model']:<10} {row['accuracy']:>7.4f} {row['teacher_agreement']:>7.4f} "
+              f"{row['flops_per_frame'] / 1e6:>8.3f} {row['parameters']:>9} {row['file_size_bytes']:>10} "
+              f"{row['latency_single']['p50_ms']:>9.3f} {row['latency_batch256']['p50_ms']:>11.3f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Distil the served model into a compact student")
+    parser.add_argument("data_dir", help="Shard directory (see train.py)")
+    parser.add_argument("--val-dir", default=None, help="Evaluation shards (defaults to data_dir)")
+    parser.add_argument("--teacher", default=None, help="Teacher model path (defaults to settings.MODEL_PATH)")
+    parser.add_argument("--output", default="student_model.keras")
+    parser.add_argument("--report", default="distill_report.json")
+    parser.add_argument("--conv1-filters", type=int, default=32)
+    parser.add_argument("--conv2-filters", type=int, default=64)
+    parser.add_argument("--dense-units", type=int, default=64)
+    parser.add_argument("--prune-ratio", type=float, default=0.5, help="Fraction of conv filters removed")
+    parser.add_argument("--epochs", type=int, default=20)
+    parser.add_argument("--finetune-epochs", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=512)
+    parser.add_argument("--learning-rate", type=float, default=1e-3)
+    parser.add_argument("--temperature", type=float, default=4.0)
+    parser.add_argument("--alpha", type=float, default=0.9, help="Weight of the distillation term")
+    parser.add_argument("--latency-iterations", type=int, default=200)
+    parser.add_argument("--intra-op-threads", type=int, default=0)
+    parser.add_argument("--inter-op-threads", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    configure_threads(args.intra_op_threads, args.inter_op_threads)
+
+    teacher = load_keras_model(args.teacher)
+    train_dataset = build_dataset(args.data_dir, args.batch_size, training=True)
+    eval_dataset = build_dataset(args.val_dir or args.data_dir, args.batch_size, training=False)
+
+    student = build_student(args.conv1_filters, args.conv2_filters, args.dense_units)
+    print(f"Distilling into {args.conv1_filters}/{args.conv2_filters}/{args.dense_units} student")
+    distill(teacher, student, train_dataset, args.epochs, args.learning_rate, args.temperature, args.alpha)
+
+    if args.prune_ratio > 0:
+        student = prune_conv_filters(student, 1.0 - args.prune_ratio)
+        print(f"Pruned to {student.conv1_filters}/{student.conv2_filters} conv filters, fine-tuning")
+        distill(teacher, student, train_dataset, args.finetune_epochs, args.learning_rate / 2,
+                args.temperature, args.alpha)
+
+    student.save(args.output)
+
+    # Reload through the API loader to prove the student is servable as-is
+    student = load_keras_model(os.path.abspath(args.output))
+    rows = [
+        profile_model("teacher", teacher, teacher, eval_dataset, resolve_model_path(args.teacher), args.latency_iterations),
+        profile_model("student", student, teacher, eval_dataset, args.output, args.latency_iterations),
+    ]
+    print_report(rows)
+    with open(args.report, "w") as f:
+        json.dump(rows, f, indent=2)
+    print(f"✅ Student saved to {args.output}, report written to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
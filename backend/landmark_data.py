@@ -0,0 +1,45 @@
+# Shared helpers for the landmark shard datasets used by the offline tools
+#
+# A dataset directory holds NAME_landmarks.npy arrays of shape (N, 21, 3),
+# (N, 63) or (N, 63, 1) with matching NAME_labels.npy arrays holding class
+# indices or alphabet names.
+import glob
+import os
+from typing import Iterator, List, Tuple
+
+import numpy as np
+
+from CNN import alphabets
+
+NUM_CLASSES = len(alphabets)
+NUM_LANDMARKS = 21
+NUM_FEATURES = NUM_LANDMARKS * 3
+
+# Rows read from a memory-mapped shard per step
+SHARD_BLOCK_SIZE = 4096
+
+
+def labels_to_indices(labels: np.ndarray) -> np.ndarray:
+    """Accept labels as class indices or as alphabet names"""
+    if labels.dtype.kind in "iu":
+        return labels.astype(np.int64)
+    lookup = {name: index for index, name in enumerate(alphabets)}
+    return np.array([lookup[str(label)] for label in labels], dtype=np.int64)
+
+
+def find_shards(data_dir: str) -> List[str]:
+    """Return the sorted shard prefixes (paths without the _landmarks.npy suffix)"""
+    prefixes = sorted(path[:-len("_landmarks.npy")] for path in glob.glob(os.path.join(data_dir, "*_landmarks.npy")))
+    if not prefixes:
+        raise FileNotFoundError(f"No *_landmarks.npy shards found in: {data_dir}")
+    return prefixes
+
+
+def read_shard(prefix) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """Yield (landmarks (n, 63) float32, label indices) blocks from a memory-mapped shard"""
+    prefix = prefix.decode() if isinstance(prefix, bytes) else prefix
+    landmarks = np.load(f"{prefix}_landmarks.npy", mmap_mode="r")
+    labels = np.load(f"{prefix}_labels.npy", mmap_mode="r")
+    for start in range(0, len(landmarks), SHARD_BLOCK_SIZE):
+        block = np.asarray(landmarks[start:start + SHARD_BLOCK_SIZE], dtype=np.float32)
+        yield block.reshape(-1, NUM_FEATURES), labels_to_indices(np.asarray(labels[start:start + SHARD_BLOCK_SIZE]))
@@ -0,0 +1,342 @@
+# Offline bulk scoring of landmark datasets
+#
+#   python score.py frames.npy --labels labels.npy --output-dir scores/ --workers 4
+#   python score.py frames.csv --output-dir scores/
+#
+# .npy inputs (N, 21, 3), (N, 63) or (N, 63, 1) are memory-mapped and split into
+# chunks scored by worker processes, which write straight into memory-mapped
+# prediction files, so the dataset is never held in RAM. CSV inputs are streamed
+# in chunks; each row holds 63 coordinates optionally followed by a label (class
+# index or letter name), and an optional header is allowed on the first line.
+# Rows that are not valid are skipped and listed by line number in
+# rejected_rows.csv. The index column of CSV predictions is the source line number.
+import argparse
+import csv
+import json
+import multiprocessing as mp
+import os
+import time
+from collections import deque
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from CNN import alphabets
+from landmark_data import NUM_CLASSES, NUM_FEATURES, SHARD_BLOCK_SIZE, labels_to_indices
+
+# Per-process state set up by _init_worker
+_worker = {}
+
+
+def _init_worker(model_path: Optional[str], threads: int, frames_path: Optional[str],
+                 labels_path: Optional[str], output_dir: Optional[str]):
+    """Load the model once per worker process, the same way the API does"""
+    import tensorflow as tf
+    if threads:
+        tf.config.threading.set_intra_op_parallelism_threads(threads)
+        tf.config.threading.set_inter_op_parallelism_threads(1)
+
+    from app.routers.prediction import load_keras_model
+    _worker["model"] = load_keras_model(model_path)
+
+    if frames_path is not None:
+        _worker["frames"] = np.load(frames_path, mmap_mode="r")
+        _worker["labels"] = np.load(labels_path, mmap_mode="r") if labels_path else None
+        _worker["predictions"] = np.load(os.path.join(output_dir, "predictions.npy"), mmap_mode="r+")
+        _worker["confidences"] = np.load(os.path.join(output_dir, "confidences.npy"), mmap_mode="r+")
+
+
+def predict_batches(model, frames: np.ndarray, batch_size: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Score frames in batches, returning class indices and confidences"""
+    classes = np.empty(len(frames), dtype=np.int16)
+    confidences = np.empty(len(frames), dtype=np.float32)
+    for start in range(0, len(frames), batch_size):
+        batch = np.asarray(frames[start:start + batch_size], dtype=np.float32).reshape(-1, NUM_FEATURES, 1)
+        probabilities = np.asarray(model.predict_on_batch(batch))
+        batch_classes = probabilities.argmax(axis=1)
+        classes[start:start + len(batch)] = batch_classes
+        confidences[start:start + len(batch)] = probabilities[np.arange(len(batch)), batch_classes]
+    return classes, confidences
+
+
+def confusion_counts(labels: Optional[np.ndarray], classes: np.ndarray) -> Optional[np.ndarray]:
+    if labels is None:
+        return None
+    flat = labels_to_indices(labels) * NUM_CLASSES + classes
+    return np.bincount(flat, minlength=NUM_CLASSES * NUM_CLASSES).reshape(NUM_CLASSES, NUM_CLASSES)
+
+
+def _score_npy_chunk(task: Tuple[int, int, int]):
+    """Score frames[start:stop] and write results into the output memmaps"""
+    start, stop, batch_size = task
+    classes, confidences = predict_batches(_worker["model"], _worker["frames"][start:stop], batch_size)
+    _worker["predictions"][start:stop] = classes
+    _worker["confidences"][start:stop] = confidences
+    labels = _worker["labels"]
+    return stop - start, confusion_counts(None if labels is None else labels[start:stop], classes)
+
+
+def _score_array_chunk(task: Tuple[np.ndarray, Optional[np.ndarray], np.ndarray, int]):
+    frames, labels, line_numbers, batch_size = task
+    classes, confidences = predict_batches(_worker["model"], frames, batch_size)
+    return line_numbers, classes, confidences, confusion_counts(labels, classes)
+
+
+def _parse_label(value: str) -> int:
+    """A class index or letter name as a class index"""
+    value = value.strip()
+    if value.isdigit():
+        index = int(value)
+        if index >= NUM_CLASSES:
+            raise ValueError(f"class index {index} out of range")
+        return index
+    if value not in alphabets:
+        raise ValueError(f"unknown label {value!r}")
+    return alphabets.index(value)
+
+
+def validate_npy_labels(labels_path: str, total: int):
+    """Check a .npy label file once, up front, with the same rules as _parse_label.
+
+    Labels are memory-mapped and checked block by block; raises ValueError naming
+    the first invalid position, so a bad file fails before any scoring starts.
+    """
+    labels = np.load(labels_path, mmap_mode="r")
+    if labels.ndim != 1 or len(labels) != total:
+        raise ValueError(f"Expected {total} labels to match the frames, got shape {labels.shape}")
+    if labels.dtype.kind not in "iuU":
+        raise ValueError(f"Labels must be class indices or letter names, got dtype {labels.dtype}")
+
+    for start in range(0, total, SHARD_BLOCK_SIZE):
+        block = np.asarray(labels[start:start + SHARD_BLOCK_SIZE])
+        if block.dtype.kind in "iu":
+            invalid = (block < 0) | (block >= NUM_CLASSES)
+        else:
+            invalid = ~np.isin(block, alphabets)
+        if invalid.any():
+            position = int(np.flatnonzero(invalid)[0])
+            value = block[position].item()
+            reason = "class index out of range" if block.dtype.kind in "iu" else "unknown label"
+            raise ValueError(f"{labels_path}[{start + position}]: {reason} {value!r}")
+
+
+def iter_csv_chunks(path: str, chunk_size: int, rejected: Optional[List[Tuple[int, str]]] = None
+                    ) -> Iterator[Tuple[np.ndarray, Optional[np.ndarray], np.ndarray]]:
+    """Stream a CSV of 63 coordinates (plus an optional label column) in chunks.
+
+    Yields (frames, label indices or None, source line numbers). Only the first
+    line may be a header; any other invalid row is skipped and recorded in
+    `rejected` as (line number, reason), or raises ValueError when `rejected` is None.
+    """
+    has_labels = None
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        rows, labels, line_numbers = [], [], []
+        for row in reader:
+            line_number = reader.line_num
+            if not row:
+                continue
+            try:
+                if len(row) not in (NUM_FEATURES, NUM_FEATURES + 1):
+                    raise ValueError(f"expected {NUM_FEATURES} or {NUM_FEATURES + 1} columns, got {len(row)}")
+                coordinates = [float(value) for value in row[:NUM_FEATURES]]
+                row_has_label = len(row) > NUM_FEATURES
+                if has_labels is not None and row_has_label != has_labels:
+                    raise ValueError("label column present on some rows only")
+                label = _parse_label(row[NUM_FEATURES]) if row_has_label else None
+            except ValueError as e:
+                if line_number == 1:
+                    continue  # header
+                if rejected is None:
+                    raise ValueError(f"{path}:{line_number}: {str(e)}") from e
+                rejected.append((line_number, str(e)))
+                continue
+
+            has_labels = row_has_label
+            rows.append(coordinates)
+            line_numbers.append(line_number)
+            if has_labels:
+                labels.append(label)
+            if len(rows) == chunk_size:
+                yield (np.array(rows, dtype=np.float32), np.array(labels, dtype=np.int64) if has_labels else None,
+                       np.array(line_numbers, dtype=np.int64))
+                rows, labels, line_numbers = [], [], []
+        if rows:
+            yield (np.array(rows, dtype=np.float32), np.array(labels, dtype=np.int64) if has_labels else None,
+                   np.array(line_numbers, dtype=np.int64))
+
+
+def _bounded_imap(pool, func, tasks, window: int):
+    """Ordered imap that only keeps `window` tasks in flight (Pool.imap drains its input eagerly)"""
+    pending = deque()
+    for task in tasks:
+        pending.append(pool.apply_async(func, (task,)))
+        if len(pending) >= window:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+
+def _make_pool(workers: int, initargs: tuple):
+    # TensorFlow is not fork-safe, so workers are spawned fresh
+    return mp.get_context("spawn").Pool(workers, initializer=_init_worker, initargs=initargs)
+
+
+def score_npy(frames_path: str, labels_path: Optional[str], output_dir: str, model_path: Optional[str],
+              workers: int, chunk_size: int, batch_size: int, threads: int) -> Tuple[int, Optional[np.ndarray]]:
+    frames = np.load(frames_path, mmap_mode="r")
+    total = len(frames)
+    if int(np.prod(frames.shape[1:])) != NUM_FEATURES:
+        raise ValueError(f"Expected {NUM_FEATURES} coordinates per frame, got shape {frames.shape}")
+    if labels_path:
+        validate_npy_labels(labels_path, total)
+
+    # Pre-size the outputs so workers can fill their slices in place
+    np.lib.format.open_memmap(os.path.join(output_dir, "predictions.npy"), mode="w+", dtype=np.int16, shape=(total,))
+    np.lib.format.open_memmap(os.path.join(output_dir, "confidences.npy"), mode="w+", dtype=np.float32, shape=(total,))
+
+    tasks = [(start, min(start + chunk_size, total), batch_size) for start in range(0, total, chunk_size)]
+    initargs = (model_path, threads, frames_path, labels_path, output_dir)
+    confusion = np.zeros((NUM_CLASSES, NUM_CLASSES), dtype=np.int64) if labels_path else None
+    scored = 0
+
+    if workers <= 1:
+        _init_worker(*initargs)
+        results = map(_score_npy_chunk, tasks)
+        pool = None
+    else:
+        pool = _make_pool(workers, initargs)
+        results = pool.imap_unordered(_score_npy_chunk, tasks)
+    try:
+        for count, chunk_confusion in results:
+            scored += count
+            if chunk_confusion is not None:
+                confusion += chunk_confusion
+            print(f"Scored {scored}/{total} frames", flush=True)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return scored, confusion
+
+
+def score_csv(csv_path: str, output_dir: str, model_path: Optional[str], workers: int,
+              chunk_size: int, batch_size: int, threads: int
+              ) -> Tuple[int, Optional[np.ndarray], List[Tuple[int, str]]]:
+    rejected: List[Tuple[int, str]] = []
+    tasks = (
+        (frames, labels, line_numbers, batch_size)
+        for frames, labels, line_numbers in iter_csv_chunks(csv_path, chunk_size, rejected)
+    )
+    initargs = (model_path, threads, None, None, None)
+    confusion = None
+    scored = 0
+
+    if workers <= 1:
+        _init_worker(*initargs)
+        results = map(_score_array_chunk, tasks)
+        pool = None
+    else:
+        pool = _make_pool(workers, initargs)
+        results = _bounded_imap(pool, _score_array_chunk, tasks, window=2 * workers)
+    try:
+        with open(os.path.join(output_dir, "predictions.csv"), "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["index", "prediction", "confidence"])
+            for line_numbers, classes, confidences, chunk_confusion in results:
+                writer.writerows(
+                    (line, alphabets[c], f"{p:.6f}") for line, c, p in zip(line_numbers, classes, confidences)
+                )
+                scored += len(classes)
+                if chunk_confusion is not None:
+                    confusion = chunk_confusion if confusion is None else confusion + chunk_confusion
+                print(f"Scored {scored} frames", flush=True)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return scored, confusion, rejected
+
+
+def write_rejected_rows(path: str, rejected: List[Tuple[int, str]]):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["line", "reason"])
+        writer.writerows(rejected)
+
+
+def build_report(total: int, confusion: Optional[np.ndarray], elapsed: float) -> dict:
+    report = {
+        "frames": total,
+        "elapsed_seconds": round(elapsed, 3),
+        "frames_per_second": round(total / elapsed, 1) if elapsed > 0 else None,
+    }
+    if confusion is not None:
+        support = confusion.sum(axis=1)
+        correct = np.diag(confusion)
+        report["accuracy"] = float(correct.sum() / max(1, support.sum()))
+        report["per_letter"] = {
+            letter: {
+                "support": int(support[i]),
+                "correct": int(correct[i]),
+                "accuracy": float(correct[i] / support[i]) if support[i] else None,
+            }
+            for i, letter in enumerate(alphabets)
+        }
+    return report
+
+
+def write_confusion_matrix(path: str, confusion: np.ndarray):
+    """Rows are true letters, columns predicted letters"""
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["true\\predicted"] + alphabets)
+        for letter, row in zip(alphabets, confusion):
+            writer.writerow([letter] + [int(count) for count in row])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score landmark datasets offline in large batches")
+    parser.add_argument("input", help=".npy array of landmarks or a CSV file")
+    parser.add_argument("--labels", help=".npy array of labels (class indices or letter names) for .npy input")
+    parser.add_argument("--output-dir", default="scores")
+    parser.add_argument("--model", default=None, help="Model path (defaults to settings.MODEL_PATH)")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 1) // 2))
+    parser.add_argument("--chunk-size", type=int, default=262144, help="Frames per worker task")
+    parser.add_argument("--batch-size", type=int, default=8192, help="Frames per inference call")
+    parser.add_argument("--threads", type=int, default=0,
+                        help="TensorFlow intra-op threads per worker (0 = cpu_count / workers)")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    threads = args.threads or max(1, (os.cpu_count() or 1) // max(1, args.workers))
+
+    start = time.perf_counter()
+    rejected = None
+    if args.input.endswith(".csv"):
+        total, confusion, rejected = score_csv(args.input, args.output_dir, args.model, args.workers,
+                                               args.chunk_size, args.batch_size, threads)
+    else:
+        total, confusion = score_npy(args.input, args.labels, args.output_dir, args.model, args.workers,
+                                     args.chunk_size, args.batch_size, threads)
+    elapsed = time.perf_counter() - start
+
+    report = build_report(total, confusion, elapsed)
+    if rejected is not None:
+        report["rejected_rows"] = len(rejected)
+        write_rejected_rows(os.path.join(args.output_dir, "rejected_rows.csv"), rejected)
+    if confusion is not None:
+        write_confusion_matrix(os.path.join(args.output_dir, "confusion_matrix.csv"), confusion)
+    with open(os.path.join(args.output_dir, "report.json"), "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"Scored {total} frames in {elapsed:.1f}s ({report['frames_per_second']} frames/s)")
+    if rejected:
+        print(f"❌ Skipped {len(rejected)} invalid rows (first at line {rejected[0][0]}: {rejected[0][1]}), "
+              f"see rejected_rows.csv")
+    if "accuracy" in report:
+        print(f"Accuracy: {report['accuracy']:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import os
+import numpy as np
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.inference import InferenceBatcher, LoadedModel
+from app.main import app
+from app.routers import prediction
+
+client = TestClient(app)
+
+LANDMARKS = [[0.1, 0.2, 0.3]] * 21
+
+
+def _fake_model(version: str, predicted_class: int) -> LoadedModel:
+    def predict_fn(batch):
+        probabilities = np.zeros((len(batch), 36), dtype=np.float32)
+        probabilities[:, predicted_class] = 1.0
+        return probabilities
+    return LoadedModel(object(), predict_fn, version, f"/models/{version}.keras")
+
+
+def _serve(monkeypatch, loaded: LoadedModel):
+    monkeypatch.setattr(prediction, "batcher", InferenceBatcher(loaded.predict_fn, max_batch_size=4, version=loaded.version))
+    monkeypatch.setattr(prediction, "model", loaded.model)
+    monkeypatch.setattr(prediction, "active_model", loaded)
+    monkeypatch.setattr(prediction, "previous_model", None)
+
+
+def test_admin_model_endpoints_require_token(monkeypatch):
+    """Test that model admin endpoints are refused without the admin token"""
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "secret")
+    assert client.get("/api/admin/model").status_code == 403
+    assert client.post("/api/admin/model/rollback", headers={"X-Admin-Token": "wrong"}).status_code == 403
+
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", None)
+    assert client.post("/api/admin/model/reload", headers={"X-Admin-Token": ""}).status_code == 403
+
+
+def test_reload_and_rollback_swap_served_model(monkeypatch):
+    """Test that a reload swaps in the new version and rollback restores the old one"""
+    old, new = _fake_model("aaaaaaaaaaaa", 0), _fake_model("bbbbbbbbbbbb", 1)
+    _serve(monkeypatch, old)
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "secret")
+    monkeypatch.setattr(prediction, "model_file_version", lambda path: new.version)
+    monkeypatch.setattr(prediction, "load_model_version", lambda path: new)
+    headers = {"X-Admin-Token": "secret"}
+
+    try:
+        response = client.post("/api/predict", json={"hand_landmarks": LANDMARKS})
+        assert response.json()["model_version"] == old.version
+
+        response = client.post("/api/admin/model/reload", json={"model_path": new.path}, headers=headers)
+        assert response.status_code == 200
+        assert response.json()["active"]["version"] == new.version
+        assert response.json()["pid"] == os.getpid()
+        assert response.json()["previous"]["version"] == old.version
+        response = client.post("/api/predict", json={"hand_landmarks": LANDMARKS})
+        assert response.json() == {"prediction": "Kha", "confidence": 1.0, "model_version": new.version}
+
+        response = client.post("/api/admin/model/rollback", headers=headers)
+        assert response.json()["active"]["version"] == old.version
+        response = client.post("/api/predict", json={"hand_landmarks": LANDMARKS})
+        assert response.json()["model_version"] == old.version
+
+        metrics = client.get("/metrics").text
+        assert f'model_info{{version="{old.version}"}} 1' in metrics
+        assert f'model_info{{version="{new.version}"}} 0' in metrics
+
+        # A third version pushes the oldest out of the rollback slot and out of the metrics
+        newest = _fake_model("cccccccccccc", 2)
+        monkeypatch.setattr(prediction, "model_file_version", lambda path: newest.version)
+        monkeypatch.setattr(prediction, "load_model_version", lambda path: newest)
+        client.post("/api/admin/model/reload", headers=headers)
+        metrics = client.get("/metrics").text
+        assert f'model_info{{version="{newest.version}"}} 1' in metrics
+        assert f'model_info{{version="{old.version}"}} 0' in metrics
+        assert new.version not in metrics
+    finally:
+        prediction.batcher.close()
+
+
+def test_rollback_refused_while_reload_in_progress(monkeypatch):
+    """Test that a rollback cannot be undone by a reload that is still loading"""
+    old, new = _fake_model("aaaaaaaaaaaa", 0), _fake_model("bbbbbbbbbbbb", 1)
+    _serve(monkeypatch, new)
+    monkeypatch.setattr(prediction, "previous_model", old)
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "secret")
+
+    assert prediction._reload_lock.acquire(blocking=False)
+    try:
+        response = client.post("/api/admin/model/rollback", headers={"X-Admin-Token": "secret"})
+    finally:
+        prediction._reload_lock.release()
+        prediction.batcher.close()
+    assert response.status_code == 409
+    assert prediction.active_model is new
@@ -0,0 +1,80 @@
+import asyncio
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.admission import AdmissionController, Overloaded
+from app.inference import InferenceBatcher
+from app.main import app
+from app.routers import prediction
+
+client = TestClient(app)
+
+
+def test_round_robin_between_clients():
+    """Test that a queued request from a quiet client is not stuck behind a chatty one"""
+    controller = AdmissionController(max_concurrency=1, max_queue_depth=16, deadline_ms=5000)
+    order = []
+
+    async def request(key: str, index: int):
+        async with controller.admit(key):
+            order.append(f"{key}{index}")
+            await asyncio.sleep(0)
+
+    async def run():
+        await controller.acquire("busy")  # occupy the only slot
+        tasks = [asyncio.create_task(request("a", i)) for i in range(4)]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(request("b", 0)))
+        await asyncio.sleep(0)
+        controller.release()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+    assert order == ["a0", "b0", "a1", "a2", "a3"]
+    assert controller.in_flight == 0 and controller.queued == 0
+
+
+def test_sheds_when_full_or_past_deadline():
+    """Test that requests are rejected when the queue is full or the deadline passes"""
+    controller = AdmissionController(max_concurrency=1, max_queue_depth=1, deadline_ms=20)
+
+    async def run():
+        await controller.acquire("a")
+        waiting = asyncio.create_task(controller.acquire("b"))
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded) as full:
+            await controller.acquire("c")
+        with pytest.raises(Overloaded) as timeout:
+            await waiting
+        return full.value, timeout.value
+
+    full, timeout = asyncio.run(run())
+    assert (full.reason, timeout.reason) == ("queue_full", "timeout")
+    assert controller.queued == 0 and controller.in_flight == 1
+
+    # With a measured service time, a wait that cannot fit the deadline is shed up front
+    controller = AdmissionController(max_concurrency=1, max_queue_depth=16, deadline_ms=20)
+    controller.in_flight, controller.service_time = 1, 0.05
+    with pytest.raises(Overloaded) as deadline:
+        asyncio.run(controller.acquire("a"))
+    assert deadline.value.reason == "deadline"
+    assert deadline.value.retry_after_header == "1"
+
+
+def test_predict_returns_503_with_retry_after_when_overloaded(monkeypatch):
+    """Test that a shed prediction gets a fast 503 with Retry-After"""
+    controller = AdmissionController(max_concurrency=1, max_queue_depth=0)
+    controller.in_flight = 1
+    monkeypatch.setattr(prediction, "admission", controller)
+    monkeypatch.setattr(prediction, "model", object())
+    monkeypatch.setattr(prediction, "batcher", InferenceBatcher(lambda batch: np.zeros((len(batch), 36))))
+
+    try:
+        response = client.post("/api/predict", json={"hand_landmarks": [[0.1, 0.2, 0.3]] * 21})
+    finally:
+        prediction.batcher.close()
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    assert 'predict_shed_total{reason="queue_full"}' in client.get("/metrics").text
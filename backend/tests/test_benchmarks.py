@@ -0,0 +1,92 @@
+from benchmarks.common import compare_results, summarize
+
+
+def test_summarize_percentiles():
+    """Test latency summary in milliseconds"""
+    stats = summarize([i / 1000 for i in range(1, 101)], elapsed=1.0)
+    assert stats["count"] == 100
+    assert stats["throughput_per_s"] == 100
+    assert stats["p50_ms"] == 50
+    assert stats["p99_ms"] == 99
+
+
+def test_compare_flags_regressions():
+    """Test that slower latency and lower throughput beyond the threshold are flagged"""
+    baseline = {"results": {
+        "micro.a": {"p50_ms": 1.0, "p95_ms": 2.0, "p99_ms": 3.0, "throughput_per_s": 1000},
+        "micro.b": {"p50_ms": 1.0, "p95_ms": 2.0, "p99_ms": 3.0, "throughput_per_s": 1000},
+    }}
+    current = {"results": {
+        "micro.a": {"p50_ms": 1.05, "p95_ms": 2.0, "p99_ms": 3.0, "throughput_per_s": 950},
+        "micro.b": {"p50_ms": 1.5, "p95_ms": 2.0, "p99_ms": 3.0, "throughput_per_s": 700},
+        "micro.new": {"p50_ms": 9.0, "p95_ms": 9.0, "p99_ms": 9.0, "throughput_per_s": 1},
+    }}
+    regressions = compare_results(baseline, current, threshold=0.10)
+    assert {(r["benchmark"], r["metric"]) for r in regressions} == {
+        ("micro.b", "p50_ms"), ("micro.b", "throughput_per_s")
+    }
+
+
+def test_compare_treats_failed_requests_as_regressions(capsys):
+    """Test that scenarios with errors are never compared as if they were fast"""
+    from benchmarks.common import print_results
+
+    clean = {"p50_ms": 10.0, "p95_ms": 20.0, "p99_ms": 30.0, "throughput_per_s": 100, "errors": 0}
+    failing = {"count": 600, "p50_ms": 1.0, "p95_ms": 2.0, "p99_ms": 3.0, "throughput_per_s": 300,
+               "errors": 600, "statuses": {"503": 600}}
+    regressions = compare_results({"results": {"load.a": clean}}, {"results": {"load.a": failing}})
+    assert [(r["metric"], r["baseline"], r["current"]) for r in regressions] == [("errors", 0, 600)]
+    # A failing baseline is refused as well
+    assert compare_results({"results": {"load.a": failing}}, {"results": {"load.a": clean}})[0]["metric"] == "errors"
+
+    print_results({"load.a": failing})
+    assert "FAILED: 600 errors" in capsys.readouterr().out
+
+
+def test_run_load_keeps_results_when_server_hangs_on_shutdown(monkeypatch):
+    """Test that a server that ignores SIGTERM is killed without losing the results"""
+    import subprocess
+    from benchmarks import load
+
+    class HangingServer:
+        killed = False
+
+        def terminate(self):
+            pass
+
+        def wait(self, timeout=None):
+            if not self.killed and timeout is not None:
+                raise subprocess.TimeoutExpired("uvicorn", timeout)
+
+        def kill(self):
+            self.killed = True
+
+    server = HangingServer()
+
+    async def fake_scenarios(url, concurrency, duration, only):
+        return {"GET /health": {"count": 1}}
+
+    monkeypatch.setattr(load, "start_server", lambda port, db_path, workers: server)
+    monkeypatch.setattr(load, "wait_until_healthy", lambda url: None)
+    monkeypatch.setattr(load, "_run_scenarios", fake_scenarios)
+    assert load.run_load(duration=0.1) == {"GET /health": {"count": 1}}
+    assert server.killed
+
+
+def test_wait_until_ready_waits_for_model():
+    """Test that ML scenarios wait for /ready rather than /health"""
+    import asyncio
+    import httpx
+    from benchmarks import load
+
+    answers = iter([503, 200, 200, 200])
+
+    def handler(request):
+        assert request.url.path == "/ready"
+        return httpx.Response(next(answers), json={"status": "ok"})
+
+    async def run():
+        async with httpx.AsyncClient(base_url="http://test", transport=httpx.MockTransport(handler)) as client:
+            return await load.wait_until_ready(client, timeout=5)
+
+    assert asyncio.run(run()) is None
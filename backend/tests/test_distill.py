@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+tf = pytest.importorskip("tensorflow")
+
+import distill
+
+
+def test_prune_conv_filters_keeps_outputs_when_nothing_is_pruned():
+    """Test that pruning with keep ratio 1.0 reproduces the student exactly"""
+    student = distill.build_student(8, 16, 32)
+    x = np.random.default_rng(0).random((4, 63, 1)).astype(np.float32)
+    pruned = distill.prune_conv_filters(student, keep_ratio=1.0)
+    np.testing.assert_allclose(pruned(x).numpy(), student(x).numpy(), atol=1e-6)
+
+
+def test_prune_conv_filters_shrinks_layers():
+    """Test that pruning halves the conv filters and the flattened dense input"""
+    student = distill.build_student(8, 16, 32)
+    pruned = distill.prune_conv_filters(student, keep_ratio=0.5)
+    assert pruned.conv1.kernel.shape == (3, 1, 4)
+    assert pruned.conv2.kernel.shape == (3, 4, 8)
+    assert pruned.dense1.kernel.shape == (16 * 8, 32)
+    assert distill.estimate_flops(pruned) < distill.estimate_flops(student)
+
+
+def test_distillation_loss_is_zero_for_identical_distributions():
+    """Test the distillation term vanishes when student matches teacher and alpha is 1"""
+    probs = tf.nn.softmax(tf.random.normal((4, 36)))
+    loss = distill.distillation_loss(probs, probs, tf.one_hot([0, 1, 2, 3], 36), temperature=4.0, alpha=1.0)
+    assert float(loss) == pytest.approx(0.0, abs=1e-5)
@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.gesture_index import GestureIndex, normalize_landmarks
+from app.main import app
+from app.routers import prediction
+
+client = TestClient(app)
+
+LETTERS = ["Ka", "Kha", "Ga", "Gha"]
+
+
+def _references(per_letter: int = 50):
+    rng = np.random.default_rng(0)
+    hands = rng.random((len(LETTERS) * per_letter, 21, 3), dtype=np.float32)
+    labels = np.tile(np.arange(len(LETTERS)), per_letter)
+    return hands, labels
+
+
+def test_normalization_ignores_position_and_scale():
+    """Test that a shifted, enlarged hand normalizes to the same vector"""
+    hand = np.random.default_rng(1).random((21, 3), dtype=np.float32)
+    moved = hand * 2.5 + np.array([0.3, -0.2, 0.1], dtype=np.float32)
+    np.testing.assert_allclose(normalize_landmarks(hand), normalize_landmarks(moved), atol=1e-5)
+
+
+def test_query_matches_brute_force(tmp_path):
+    """Test that per-letter distances agree with a scan over every reference"""
+    hands, labels = _references()
+    vectors = normalize_landmarks(hands)
+    index = GestureIndex(vectors, labels, LETTERS)
+    query = normalize_landmarks(np.random.default_rng(2).random((21, 3), dtype=np.float32))
+
+    expected = sorted(
+        (float(np.linalg.norm(vectors[labels == i] - query, axis=1).min()), letter)
+        for i, letter in enumerate(LETTERS)
+    )
+    matches = index.query(query, k=3)
+    assert [letter for letter, _ in matches] == [letter for _, letter in expected[:3]]
+    np.testing.assert_allclose([d for _, d in matches], [d for d, _ in expected[:3]], atol=1e-4)
+
+    index.save(tmp_path / "index.npz")
+    assert GestureIndex.load(str(tmp_path / "index.npz")).query(query, k=3) == matches
+
+
+def test_build_index_reduces_letters_to_prototypes():
+    """Test that the offline builder keeps at most max_per_letter references per letter"""
+    pytest.importorskip("tensorflow")
+    from build_gesture_index import build_index
+
+    hands, labels = _references()
+    index = build_index(normalize_landmarks(hands), labels, max_per_letter=8)
+    assert len(index) == 8 * len(LETTERS)
+    assert index.letters == LETTERS
+
+
+def test_similar_endpoint(monkeypatch):
+    """Test that /api/similar returns the closest letters, nearest first"""
+    monkeypatch.setattr(prediction, "gesture_index", None)
+    hand = np.random.default_rng(3).random((21, 3)).tolist()
+    assert client.post("/api/similar", json={"hand_landmarks": hand}).status_code == 503
+
+    hands, labels = _references()
+    hands[0] = hand  # an exact reference for "Ka"
+    monkeypatch.setattr(prediction, "gesture_index", GestureIndex(normalize_landmarks(hands), labels, LETTERS))
+    response = client.post("/api/similar", json={"hand_landmarks": hand, "k": 2})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["mode"] == "landmarks"
+    assert data["matches"][0]["letter"] == "Ka"
+    assert data["matches"][0]["distance"] == pytest.approx(0.0, abs=1e-3)
+    assert len(data["matches"]) == 2
+
+    assert client.post("/api/similar", json={"hand_landmarks": [[0.1, 0.2, 0.3]] * 20}).status_code == 400
+
+
+def test_similar_embedding_queries_go_through_admission(monkeypatch):
+    """Test that model-backed similarity lookups are version-checked and shed under overload"""
+    from app.admission import AdmissionController
+    from app.gesture_index import EMBEDDING
+    from app.inference import LoadedModel
+
+    hands, labels = _references()
+    index = GestureIndex(normalize_landmarks(hands), labels, LETTERS, mode=EMBEDDING, model_version="aaaaaaaaaaaa")
+    controller = AdmissionController(max_concurrency=1, max_queue_depth=0)
+    controller.in_flight = 1
+    monkeypatch.setattr(prediction, "gesture_index", index)
+    monkeypatch.setattr(prediction, "admission", controller)
+    hand = {"hand_landmarks": hands[0].tolist()}
+
+    monkeypatch.setattr(prediction, "active_model", LoadedModel(object(), None, "bbbbbbbbbbbb", "/models/b.keras"))
+    response = client.post("/api/similar", json=hand)
+    assert response.status_code == 503 and "different model version" in response.json()["detail"]
+
+    monkeypatch.setattr(prediction, "active_model", LoadedModel(object(), None, "aaaaaaaaaaaa", "/models/a.keras"))
+    response = client.post("/api/similar", json=hand)
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
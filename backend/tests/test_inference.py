@@ -0,0 +1,82 @@
+import asyncio
+import json
+import numpy as np
+from app.config import settings
+from app.inference import InferenceBatcher, load_tuning
+
+
+def _sum_predict_fn(calls):
+    def predict_fn(batch):
+        calls.append(len(batch))
+        return batch.reshape(len(batch), -1).sum(axis=1, keepdims=True)
+    return predict_fn
+
+
+def test_batcher_groups_concurrent_requests():
+    """Test that concurrent requests share batches and get their own results back"""
+    calls = []
+    batcher = InferenceBatcher(_sum_predict_fn(calls), max_batch_size=4, batch_window_ms=50, workers=1)
+
+    async def run():
+        samples = [np.full((63, 1), i, dtype=np.float32) for i in range(10)]
+        return await asyncio.gather(*(batcher.predict(sample) for sample in samples))
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        batcher.close()
+    assert [float(row[0]) for row, _ in results] == [63.0 * i for i in range(10)]
+    assert sum(calls) == 10
+    assert max(calls) == 4
+    assert len(calls) < 10
+
+
+def test_batcher_propagates_errors():
+    """Test that a failing batch fails every request in it"""
+    def failing_predict_fn(batch):
+        raise ValueError("boom")
+
+    batcher = InferenceBatcher(failing_predict_fn, max_batch_size=2, batch_window_ms=1, workers=1)
+
+    async def run():
+        return await asyncio.gather(
+            *(batcher.predict(np.zeros((63, 1), dtype=np.float32)) for _ in range(3)),
+            return_exceptions=True,
+        )
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        batcher.close()
+    assert all(isinstance(r, ValueError) for r in results)
+
+
+def test_load_tuning_applies_config_but_not_over_env(monkeypatch, tmp_path):
+    """Test that tuning values apply unless the setting was set explicitly"""
+    path = tmp_path / "tuning.json"
+    path.write_text(json.dumps({"config": {"INFERENCE_MAX_BATCH_SIZE": 64, "INFERENCE_WORKERS": 3}}))
+    monkeypatch.setattr(settings, "INFERENCE_MAX_BATCH_SIZE", settings.INFERENCE_MAX_BATCH_SIZE)
+    monkeypatch.setattr(settings, "INFERENCE_WORKERS", settings.INFERENCE_WORKERS)
+    monkeypatch.setattr(type(settings), "model_fields_set", property(lambda self: {"INFERENCE_WORKERS"}))
+
+    applied = load_tuning(str(path))
+    assert applied == {"INFERENCE_MAX_BATCH_SIZE": 64}
+    assert settings.INFERENCE_MAX_BATCH_SIZE == 64
+
+
+def test_batcher_swap_applies_between_batches():
+    """Test that a swapped model serves the next batch and reports its version"""
+    batcher = InferenceBatcher(lambda batch: np.zeros((len(batch), 1)), max_batch_size=1, version="old")
+
+    async def run():
+        first = await batcher.predict(np.zeros((63, 1), dtype=np.float32))
+        batcher.swap(lambda batch: np.ones((len(batch), 1)), "new")
+        second = await batcher.predict(np.zeros((63, 1), dtype=np.float32))
+        return first, second
+
+    try:
+        (first_row, first_version), (second_row, second_version) = asyncio.run(run())
+    finally:
+        batcher.close()
+    assert (float(first_row[0]), first_version) == (0.0, "old")
+    assert (float(second_row[0]), second_version) == (1.0, "new")
@@ -65,3 +65,48 @@ def test_protected_endpoint_without_auth():
     """Test accessing protected endpoint without authentication"""
     response = client.get("/api/course-counts")
     assert response.status_code == 401
+
+
+def test_ready_reports_components_before_startup():
+    """Test readiness probe before the model and database are initialized"""
+    from app.readiness import readiness
+    readiness.reset()
+    response = client.get("/ready")
+    assert response.status_code == 503
+    data = response.json()
+    assert data["status"] == "not_ready"
+    assert set(data["components"]) == {"database", "model", "warmup"}
+
+
+def test_startup_serves_while_model_loads_in_background(monkeypatch):
+    """Test that startup does not wait for the model and /ready flips once it is warm"""
+    import threading
+    import time
+    import numpy as np
+    from app.inference import InferenceBatcher
+    from app.readiness import readiness, READY
+    from app.routers import prediction
+
+    release = threading.Event()
+
+    def slow_load_model():
+        release.wait(5)
+        prediction.model = object()
+        prediction.batcher = InferenceBatcher(lambda batch: np.zeros((len(batch), 36)), max_batch_size=4)
+        readiness.set("model", READY)
+
+    monkeypatch.setattr(prediction, "model", None)
+    monkeypatch.setattr(prediction, "batcher", None)
+    monkeypatch.setattr(prediction, "load_model", slow_load_model)
+
+    with TestClient(app) as startup_client:
+        assert startup_client.get("/health").status_code == 200
+        data = startup_client.get("/ready").json()
+        assert data["components"]["database"] == "ready"
+        assert data["components"]["model"] != "ready"
+
+        release.set()
+        deadline = time.time() + 5
+        while time.time() < deadline and startup_client.get("/ready").status_code != 200:
+            time.sleep(0.01)
+        assert startup_client.get("/ready").json()["status"] == "ready"
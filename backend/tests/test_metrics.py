@@ -0,0 +1,76 @@
+import time
+from fastapi.testclient import TestClient
+from app.main import app
+from app.metrics import Histogram, MetricsMiddleware
+
+client = TestClient(app)
+
+
+def test_metrics_endpoint_exposes_prometheus_text():
+    """Test that /metrics renders in Prometheus text format"""
+    client.get("/health")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert "# TYPE http_requests_total counter" in body
+    assert 'http_requests_total{method="GET",route="/health",status="2xx"}' in body
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/health",le="+Inf"}' in body
+
+
+def test_metrics_record_status_class_and_db_time():
+    """Test that error responses and DB time are recorded per route template"""
+    client.get("/api/course-counts")
+    client.post(
+        "/api/auth/register",
+        json={"username": "metricsuser", "email": "metrics@example.com", "password": "testpassword123"}
+    )
+    body = client.get("/metrics").text
+    assert 'http_requests_total{method="GET",route="/api/course-counts",status="4xx"}' in body
+    db_count_line = next(
+        line for line in body.splitlines()
+        if line.startswith('http_request_db_seconds_count{route="/api/auth/register"}')
+    )
+    assert int(db_count_line.split()[-1]) >= 1
+    db_sum_line = next(
+        line for line in body.splitlines()
+        if line.startswith('http_request_db_seconds_sum{route="/api/auth/register"}')
+    )
+    assert float(db_sum_line.split()[-1]) > 0
+
+
+def test_histogram_buckets_are_cumulative():
+    """Test histogram rendering"""
+    histogram = Histogram("test_latency_seconds", "Test histogram", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value)
+    lines = histogram.render()
+    assert 'test_latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 'test_latency_seconds_bucket{le="1"} 2' in lines
+    assert 'test_latency_seconds_bucket{le="+Inf"} 3' in lines
+    assert "test_latency_seconds_count 3" in lines
+
+
+def test_metrics_middleware_overhead_is_small():
+    """Test that the per-request instrumentation cost stays in the tens of microseconds"""
+    import asyncio
+
+    async def noop_app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def noop_send(message):
+        pass
+
+    async def run(handler, iterations):
+        scope = {"type": "http", "method": "GET", "path": "/overhead"}
+        start = time.perf_counter()
+        for _ in range(iterations):
+            await handler(dict(scope), None, noop_send)
+        return time.perf_counter() - start
+
+    iterations = 5000
+    bare = asyncio.run(run(noop_app, iterations))
+    instrumented = asyncio.run(run(MetricsMiddleware(noop_app), iterations))
+    overhead_per_request = (instrumented - bare) / iterations
+    assert overhead_per_request < 50e-6
@@ -0,0 +1,65 @@
+import time
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.config import settings
+from app.main import app
+from app.profiling import ProfilingMiddleware, list_profiles
+
+client = TestClient(app)
+
+
+def _busy_app():
+    busy = FastAPI()
+    busy.add_middleware(ProfilingMiddleware)
+
+    @busy.get("/busy")
+    def busy_endpoint():
+        deadline = time.perf_counter() + 0.05
+        while time.perf_counter() < deadline:
+            pass
+        return {"ok": True}
+
+    return busy
+
+
+def _wait_for_profiles(count, timeout=2.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        profiles = list_profiles()
+        if len(profiles) >= count:
+            return profiles
+        time.sleep(0.01)
+    return list_profiles()
+
+
+def test_profile_written_for_privileged_header(monkeypatch, tmp_path):
+    """Test that a request with the X-Profile token is profiled and listed"""
+    monkeypatch.setattr(settings, "PROFILE_TOKEN", "secret")
+    monkeypatch.setattr(settings, "PROFILE_DIR", str(tmp_path))
+    busy_client = TestClient(_busy_app())
+
+    assert busy_client.get("/busy").status_code == 200
+    assert busy_client.get("/busy", headers={"X-Profile": "wrong"}).status_code == 200
+    assert busy_client.get("/busy", headers={"X-Profile": "secret"}).status_code == 200
+
+    profiles = _wait_for_profiles(1)
+    assert len(profiles) == 1
+    assert profiles[0]["route"] == "/busy"
+    assert profiles[0]["samples"] > 0
+    assert profiles[0]["scope"] == "process"
+
+    response = client.get("/api/profiles", headers={"X-Profile": "secret"})
+    assert response.status_code == 200
+    assert response.json()[0]["name"] == profiles[0]["name"]
+
+    response = client.get(f"/api/profiles/{profiles[0]['name']}", headers={"X-Profile": "secret"})
+    assert response.status_code == 200
+    assert "busy_endpoint" in response.text
+
+
+def test_profiles_require_token(monkeypatch):
+    """Test that profile listing is forbidden without the token"""
+    monkeypatch.setattr(settings, "PROFILE_TOKEN", "secret")
+    assert client.get("/api/profiles").status_code == 403
+    monkeypatch.setattr(settings, "PROFILE_TOKEN", None)
+    assert client.get("/api/profiles", headers={"X-Profile": "secret"}).status_code == 403
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("tensorflow")
+
+import score
+
+
+def test_iter_csv_chunks_streams_rows_and_labels(tmp_path):
+    """Test CSV streaming with a header and a trailing label column"""
+    path = tmp_path / "frames.csv"
+    rows = [",".join(f"c{i}" for i in range(63)) + ",label"]
+    rows += [",".join(["0.5"] * 63) + ",Ka" for _ in range(4)]
+    rows += [",".join(["0.5"] * 63) + ",1"]
+    path.write_text("\n".join(rows) + "\n")
+
+    chunks = list(score.iter_csv_chunks(str(path), chunk_size=2))
+    assert [len(frames) for frames, _, _ in chunks] == [2, 2, 1]
+    assert chunks[0][0].shape == (2, 63)
+    assert list(np.concatenate([labels for _, labels, _ in chunks])) == [0, 0, 0, 0, 1]
+    assert list(np.concatenate([lines for _, _, lines in chunks])) == [2, 3, 4, 5, 6]
+
+
+def test_iter_csv_chunks_rejects_invalid_rows_by_line(tmp_path):
+    """Test that invalid rows after the first line are reported, not taken for headers"""
+    path = tmp_path / "frames.csv"
+    good = ",".join(["0.5"] * 63)
+    rows = [good, good, good.replace("0.5", "x", 1), ",".join(["0.5"] * 62), good + ",Nope", good]
+    path.write_text("\n".join(rows) + "\n")
+
+    rejected = []
+    chunks = list(score.iter_csv_chunks(str(path), chunk_size=10, rejected=rejected))
+    assert list(chunks[0][2]) == [1, 2, 6]
+    assert chunks[0][1] is None
+    assert [line for line, _ in rejected] == [3, 4, 5]
+
+    with pytest.raises(ValueError, match=":3:"):
+        list(score.iter_csv_chunks(str(path), chunk_size=10))
+
+
+def test_build_report_per_letter_accuracy():
+    """Test accuracy and per-letter breakdown from a confusion matrix"""
+    labels = np.array([0, 0, 1, 1])
+    classes = np.array([0, 1, 1, 1])
+    confusion = score.confusion_counts(labels, classes)
+    report = score.build_report(4, confusion, elapsed=1.0)
+    assert report["accuracy"] == 0.75
+    assert report["per_letter"]["Ka"] == {"support": 2, "correct": 1, "accuracy": 0.5}
+    assert report["per_letter"]["Kha"]["accuracy"] == 1.0
+    assert report["per_letter"]["Ga"]["accuracy"] is None
+
+
+def test_validate_npy_labels_rejects_bad_labels_up_front(tmp_path):
+    """Test that .npy labels are range- and name-checked before scoring"""
+    path = tmp_path / "labels.npy"
+    np.save(path, np.array([0, 35, 3]))
+    score.validate_npy_labels(str(path), 3)
+
+    for labels, message in [
+        (np.array([0, -1, 3]), r"\[1\]: class index out of range -1"),
+        (np.array([0, 1, 36]), r"\[2\]: class index out of range 36"),
+        (np.array(["Ka", "Nope"]), r"\[1\]: unknown label 'Nope'"),
+        (np.array([0.0, 1.0]), "dtype float64"),
+    ]:
+        np.save(path, labels)
+        with pytest.raises(ValueError, match=message):
+            score.validate_npy_labels(str(path), len(labels))
+
+    np.save(path, np.array(["Ka", "Kha"]))
+    score.validate_npy_labels(str(path), 2)
+    with pytest.raises(ValueError, match="Expected 3 labels"):
+        score.validate_npy_labels(str(path), 3)
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+tf = pytest.importorskip("tensorflow")
+
+import train
+
+
+def test_augment_batch_preserves_shape_and_wrist_distances():
+    """Test that rotation and jitter-free augmentation is a rigid motion about the wrist"""
+    landmarks = np.random.default_rng(0).random((8, 63)).astype(np.float32)
+    augmented = train.augment_batch(tf.constant(landmarks), rotation=0.5, scale=0.0, jitter=0.0).numpy()
+    assert augmented.shape == (8, 63)
+
+    original = landmarks.reshape(8, 21, 3)
+    moved = augmented.reshape(8, 21, 3)
+    np.testing.assert_allclose(moved[:, 0], original[:, 0], atol=1e-6)
+    np.testing.assert_allclose(
+        np.linalg.norm(moved - moved[:, :1], axis=-1),
+        np.linalg.norm(original - original[:, :1], axis=-1),
+        atol=1e-5,
+    )
+
+
+def test_build_dataset_streams_shards(tmp_path):
+    """Test that shards are batched into model-shaped inputs with one-hot labels"""
+    rng = np.random.default_rng(0)
+    for shard in range(2):
+        np.save(tmp_path / f"s{shard}_landmarks.npy", rng.random((50, 21, 3)).astype(np.float32))
+        np.save(tmp_path / f"s{shard}_labels.npy", rng.integers(0, 36, 50))
+
+    dataset = train.build_dataset(str(tmp_path), batch_size=16, training=True, shuffle_buffer=100)
+    batches = list(dataset)
+    assert len(batches) == 100 // 16
+    x, y = batches[0]
+    assert x.shape == (16, 63, 1)
+    assert y.shape == (16, 36)
@@ -0,0 +1,174 @@
+# Training entry point for NSLPredictionModel
+#
+#   python train.py data/train --val-dir data/val --epochs 30 --output trained_model.keras
+#
+# Training data is a directory of shards: NAME_landmarks.npy arrays of shape
+# (N, 21, 3), (N, 63) or (N, 63, 1) with matching NAME_labels.npy arrays holding
+# class indices or alphabet names. Shards are memory-mapped and streamed through
+# a tf.data pipeline, so the dataset never has to fit in RAM. Interrupted runs
+# resume from the last completed epoch when started again with the same
+# --checkpoint-dir.
+import argparse
+import os
+import time
+
+import numpy as np
+import tensorflow as tf
+
+from CNN import NSLPredictionModel, custom_categorical_crossentropy, custom_accuracy
+from landmark_data import NUM_CLASSES, NUM_FEATURES, NUM_LANDMARKS, find_shards, read_shard
+
+
+def augment_batch(landmarks, rotation: float = 0.2, scale: float = 0.1, jitter: float = 0.01):
+    """Randomly rotate (about the z axis), scale and jitter a batch of hands around the wrist.
+
+    landmarks has shape (batch, 63); every sample gets its own parameters but the
+    whole batch is transformed with a single einsum.
+    """
+    batch_size = tf.shape(landmarks)[0]
+    points = tf.reshape(landmarks, (batch_size, NUM_LANDMARKS, 3))
+    wrist = points[:, :1, :]
+
+    angles = tf.random.uniform((batch_size,), -rotation, rotation)
+    cos, sin = tf.cos(angles), tf.sin(angles)
+    zeros, ones = tf.zeros_like(angles), tf.ones_like(angles)
+    rotations = tf.reshape(
+        tf.stack([cos, -sin, zeros, sin, cos, zeros, zeros, zeros, ones], axis=1),
+        (batch_size, 3, 3),
+    )
+    scales = tf.random.uniform((batch_size, 1, 1), 1.0 - scale, 1.0 + scale)
+
+    points = tf.einsum("bij,bkj->bki", rotations, points - wrist) * scales + wrist
+    points += tf.random.normal(tf.shape(points), stddev=jitter)
+    return tf.reshape(points, (batch_size, NUM_FEATURES))
+
+
+def build_dataset(data_dir: str, batch_size: int, training: bool, cache: str = None,
+                  shuffle_buffer: int = 100_000, augment: bool = True) -> tf.data.Dataset:
+    """Streaming input pipeline: interleaved shard reads -> cache -> shuffle -> batch -> augment -> prefetch"""
+    prefixes = find_shards(data_dir)
+    signature = (
+        tf.TensorSpec(shape=(None, NUM_FEATURES), dtype=tf.float32),
+        tf.TensorSpec(shape=(None,), dtype=tf.int64),
+    )
+
+    files = tf.data.Dataset.from_tensor_slices(prefixes)
+    if training:
+        files = files.shuffle(len(prefixes))
+    dataset = files.interleave(
+        lambda prefix: tf.data.Dataset.from_generator(read_shard, args=(prefix,), output_signature=signature),
+        cycle_length=min(len(prefixes), os.cpu_count() or 1),
+        num_parallel_calls=tf.data.AUTOTUNE,
+        deterministic=not training,
+    ).unbatch()
+
+    # Shard headers give the exact sample count, so Keras knows the epoch length up front
+    total = sum(len(np.load(f"{prefix}_landmarks.npy", mmap_mode="r")) for prefix in prefixes)
+    dataset = dataset.apply(tf.data.experimental.assert_cardinality(total))
+
+    # Cache the decoded samples (in memory, or to a file when a path is given) before
+    # the random stages so every epoch still sees fresh shuffles and augmentations
+    if cache is not None:
+        dataset = dataset.cache(cache)
+    if training:
+        dataset = dataset.shuffle(shuffle_buffer, reshuffle_each_iteration=True)
+
+    dataset = dataset.batch(batch_size, drop_remainder=training, num_parallel_calls=tf.data.AUTOTUNE)
+    if training and augment:
+        dataset = dataset.map(lambda x, y: (augment_batch(x), y), num_parallel_calls=tf.data.AUTOTUNE)
+    dataset = dataset.map(
+        lambda x, y: (tf.reshape(x, (-1, NUM_FEATURES, 1)), tf.one_hot(y, NUM_CLASSES)),
+        num_parallel_calls=tf.data.AUTOTUNE,
+    )
+    return dataset.prefetch(tf.data.AUTOTUNE)
+
+
+class ThroughputLogger(tf.keras.callbacks.Callback):
+    """Log samples/second for every epoch"""
+
+    def __init__(self, batch_size: int):
+        super().__init__()
+        self.batch_size = batch_size
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._batches = 0
+        self._start = time.perf_counter()
+
+    def on_train_batch_end(self, batch, logs=None):
+        self._batches += 1
+
+    def on_epoch_end(self, epoch, logs=None):
+        elapsed = time.perf_counter() - self._start
+        samples = self._batches * self.batch_size
+        throughput = samples / elapsed if elapsed > 0 else 0.0
+        if logs is not None:
+            logs["samples_per_second"] = throughput
+        print(f"Epoch {epoch + 1}: {samples} samples in {elapsed:.1f}s ({throughput:,.0f} samples/s)")
+
+
+def configure_threads(intra_op: int, inter_op: int):
+    """Use every core by default; must run before TensorFlow executes any op"""
+    if intra_op:
+        tf.config.threading.set_intra_op_parallelism_threads(intra_op)
+    if inter_op:
+        tf.config.threading.set_inter_op_parallelism_threads(inter_op)
+
+
+def build_model(learning_rate: float) -> tf.keras.Model:
+    model = NSLPredictionModel()
+    model(tf.zeros((1, NUM_FEATURES, 1)))
+    model.compile(
+        optimizer=tf.keras.optimizers.Adam(learning_rate),
+        loss=custom_categorical_crossentropy,
+        metrics=[custom_accuracy],
+    )
+    return model
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train NSLPredictionModel on sharded landmark data")
+    parser.add_argument("data_dir", help="Directory of NAME_landmarks.npy / NAME_labels.npy shards")
+    parser.add_argument("--val-dir", default=None)
+    parser.add_argument("--output", default="trained_model.keras",
+                        help="Written next to, not over, the served model")
+    parser.add_argument("--checkpoint-dir", default="checkpoints")
+    parser.add_argument("--epochs", type=int, default=30)
+    parser.add_argument("--batch-size", type=int, default=512)
+    parser.add_argument("--learning-rate", type=float, default=1e-3)
+    parser.add_argument("--shuffle-buffer", type=int, default=100_000)
+    parser.add_argument("--cache", default=None,
+                        help="Cache decoded samples: '' for memory, or a file path prefix for on-disk")
+    parser.add_argument("--no-augment", action="store_true")
+    parser.add_argument("--intra-op-threads", type=int, default=0, help="0 = TensorFlow default (all cores)")
+    parser.add_argument("--inter-op-threads", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    configure_threads(args.intra_op_threads, args.inter_op_threads)
+
+    train_dataset = build_dataset(
+        args.data_dir, args.batch_size, training=True, cache=args.cache,
+        shuffle_buffer=args.shuffle_buffer, augment=not args.no_augment,
+    )
+    val_dataset = build_dataset(args.val_dir, args.batch_size, training=False) if args.val_dir else None
+
+    model = build_model(args.learning_rate)
+
+    os.makedirs(args.checkpoint_dir, exist_ok=True)
+    callbacks = [
+        # Restores model, optimizer and epoch counter when a previous run was interrupted
+        tf.keras.callbacks.BackupAndRestore(os.path.join(args.checkpoint_dir, "backup")),
+        tf.keras.callbacks.ModelCheckpoint(
+            os.path.join(args.checkpoint_dir, "epoch-{epoch:03d}.keras"),
+            save_freq="epoch",
+        ),
+        ThroughputLogger(args.batch_size),
+    ]
+
+    model.fit(train_dataset, validation_data=val_dataset, epochs=args.epochs, callbacks=callbacks, verbose=2)
+
+    model.save(args.output)
+    print(f"✅ Model saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()